@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
 
@@ -50,12 +51,29 @@ class Settings(BaseSettings):
     )
 
     def ensure_directories(self):
-        """Crea los directorios necesarios si no existen"""
-        self.DATA_DIR.mkdir(parents=True, exist_ok=True)
-        self.LOGS_DIR.mkdir(parents=True, exist_ok=True)
-        self.TRANSCRIPTS_DIR.mkdir(parents=True, exist_ok=True)
-        self.THUMBNAILS_DIR.mkdir(parents=True, exist_ok=True)
+        """Crea los directorios necesarios si no existen (solo la primera vez)"""
+        global _DIRS_READY
+        if _DIRS_READY:
+            return
+        for directory in (self.DATA_DIR, self.LOGS_DIR, self.TRANSCRIPTS_DIR, self.THUMBNAILS_DIR):
+            directory.mkdir(parents=True, exist_ok=True)
+        _DIRS_READY = True
+
+
+# ensure_directories() se llama desde varios puntos de arranque; con este
+# flag los mkdir solo se ejecutan en la primera llamada del proceso
+_DIRS_READY = False
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Construye (una sola vez por proceso) la configuración validada.
+
+    Cachear la instancia evita re-parsear .env y re-validar todos los
+    campos cada vez que un módulo necesita la configuración.
+    """
+    return Settings()
 
 
 # Instancia global de configuración
-settings = Settings()
+settings = get_settings()
@@ -14,14 +14,27 @@ ESTILO REQUERIDO:
 """
 
 import json
+import os
 import re
 import base64
 import io
 import sys
+from functools import lru_cache
 from pathlib import Path
 from PIL import Image, ImageDraw, ImageFont
 import google.generativeai as genai
 
+# orjson (opcional) es 2-5x más rápido que json para leer la metadata
+try:
+    import orjson
+
+    def _json_loads(data):
+        return orjson.loads(data)
+
+except ImportError:
+    def _json_loads(data):
+        return json.loads(data)
+
 # Configuración
 BASE_DIR = Path(__file__).parent
 DATA_DIR = BASE_DIR / "data"
@@ -38,6 +51,19 @@ TARGET_HEIGHT = 720
 # Modelo de Gemini para generación de imágenes
 GEMINI_IMAGE_MODEL = "models/gemini-3-pro-image-preview"
 
+# Patrones precompilados (se ejecutan por cada título procesado)
+_EP_PREFIX_RE = re.compile(r'^G33K TEAM - S1E(\d+) \| ')
+_SPLIT_RE = re.compile(r'[:,&+]|\s+y\s+')
+# El tema principal solo corta en ':' y ',': '&', '+' y ' y ' forman parte
+# del tema visible en el thumbnail ("IA & Robots"), no son separadores
+_TOPIC_SPLIT_RE = re.compile(r'[:,]')
+_EP_RE = re.compile(r'S1E(\d+)')
+
+# Emojis comunes en títulos; iterar el string cubre también los codepoints
+# de las secuencias ZWJ (👨‍💼) y los selectores de variación (FE0F)
+_EMOJI_SET = "🎙️💻🤯🚀🧠💡♨️🤖📱⚡🎧🛠️⏰🎮🌐🔒💸🍕🦶💾🔄✨👴📉⚠️☁️👨‍💼🏢⚖️💰🔥"
+_EMOJI_TBL = dict.fromkeys(map(ord, _EMOJI_SET))
+
 # Prompt base para generar thumbnails consistentes
 THUMBNAIL_PROMPT_TEMPLATE = """Generate a YouTube thumbnail image in the EXACT same visual style as this reference image.
 
@@ -72,69 +98,95 @@ REQUIREMENTS:
 Generate an image that matches the warm brown aesthetic of the reference exactly."""
 
 
-def load_api_key() -> str:
-    """Carga la API key de Gemini."""
+@lru_cache(maxsize=1)
+def _env_dict() -> dict:
+    """Parsea .env una sola vez por proceso y cachea el resultado."""
     env_path = BASE_DIR / ".env"
+    env_vars = {}
     if env_path.exists():
-        with open(env_path) as f:
-            for line in f:
-                if line.startswith("GEMINI_API_KEY="):
-                    return line.split("=", 1)[1].strip()
-    import os
-    return os.getenv("GEMINI_API_KEY", "")
+        for line in env_path.read_text(encoding="utf-8").splitlines():
+            if not line or line.startswith("#") or "=" not in line:
+                continue
+            key, _, value = line.partition("=")
+            env_vars[key.strip()] = value.strip()
+    return env_vars
+
+
+def load_api_key() -> str:
+    """Carga la API key de Gemini."""
+    return _env_dict().get("GEMINI_API_KEY") or os.getenv("GEMINI_API_KEY", "")
+
+
+FONT_PATHS = [
+    "/System/Library/Fonts/Supplemental/Impact.ttf",
+    "/System/Library/Fonts/Supplemental/Arial Bold.ttf",
+    "/Library/Fonts/Arial Bold.ttf",
+    "/System/Library/Fonts/Helvetica.ttc",
+]
 
 
+@lru_cache(maxsize=1)
+def _font_path():
+    """Encuentra (una sola vez) la primera fuente del sistema disponible."""
+    for font_path in FONT_PATHS:
+        if Path(font_path).exists():
+            return font_path
+    return None
+
+
+@lru_cache(maxsize=16)
 def load_font(size: int):
-    """Carga fuente del sistema."""
-    font_paths = [
-        "/System/Library/Fonts/Supplemental/Impact.ttf",
-        "/System/Library/Fonts/Supplemental/Arial Bold.ttf",
-        "/Library/Fonts/Arial Bold.ttf",
-        "/System/Library/Fonts/Helvetica.ttc",
-    ]
-    for font_path in font_paths:
+    """Carga fuente del sistema (cacheada por tamaño)."""
+    font_path = _font_path()
+    if font_path:
         try:
             return ImageFont.truetype(font_path, size)
-        except:
-            continue
+        except OSError:
+            pass
     return ImageFont.load_default()
 
 
 def add_text_with_outline(draw, text, position, font, fill_color, outline_color, outline_width=3):
-    """Añade texto con borde."""
-    x, y = position
-    for dx in range(-outline_width, outline_width + 1):
-        for dy in range(-outline_width, outline_width + 1):
-            if dx != 0 or dy != 0:
-                draw.text((x + dx, y + dy), text, font=font, fill=outline_color)
-    draw.text(position, text, font=font, fill=fill_color)
+    """Añade texto con borde (stroke nativo de Pillow, un solo rasterizado)."""
+    draw.text(
+        position,
+        text,
+        font=font,
+        fill=fill_color,
+        stroke_width=outline_width,
+        stroke_fill=outline_color,
+    )
+
+
+def _parse_title(title: str) -> tuple:
+    """Extrae número de episodio y resto del título en un solo escaneo."""
+    match = _EP_PREFIX_RE.match(title)
+    if match:
+        return int(match.group(1)), title[match.end():]
+    # Sin prefijo estándar: buscar S1EXX suelto en el título
+    match = _EP_RE.search(title)
+    return (int(match.group(1)) if match else 99), title
 
 
 def extract_topic_info(title: str) -> tuple:
     """Extrae tema principal y keywords del título."""
     # Remover prefijo G33K TEAM - S1EXX |
-    clean = re.sub(r'G33K TEAM - S1E\d+ \| ', '', title)
-    # Remover emojis comunes
-    clean = re.sub(r'[🎙️💻🤯🚀🧠💡♨️🤖📱⚡🎧🛠️⏰🎮🌐🔒💸🍕🦶💾🔄✨👴📉⚠️☁️👨‍💼🏢⚖️💰🔥]', '', clean)
+    clean = _parse_title(title)[1]
+    # Remover emojis comunes (una pasada C con tabla de traducción)
+    clean = clean.translate(_EMOJI_TBL)
 
-    # Tema principal (antes de : o ,)
-    parts = re.split(r'[:\,]', clean)
-    main_topic = parts[0].strip() if parts else clean
+    # Tema principal con sus delimitadores originales (solo ':' y ',')
+    main_topic = _TOPIC_SPLIT_RE.split(clean, 1)[0].strip()
 
-    # Keywords
-    keywords = []
-    for part in clean.replace(':', ',').replace('&', ',').replace(' y ', ',').replace('+', ',').split(','):
-        kw = part.strip()
-        if kw and len(kw) > 2:
-            keywords.append(kw)
+    # Keywords con el split amplio (incluye '&', '+' y ' y ')
+    keywords = [kw for kw in (p.strip() for p in _SPLIT_RE.split(clean)) if len(kw) > 2]
 
     return main_topic[:35], keywords[:5]
 
 
 def get_episode_number(title: str) -> int:
     """Extrae número de episodio del título."""
-    match = re.search(r'S1E(\d+)', title)
-    return int(match.group(1)) if match else 99
+    return _parse_title(title)[0]
 
 
 def generate_monitors_description(keywords: list) -> str:
@@ -152,6 +204,18 @@ def generate_monitors_description(keywords: list) -> str:
     return "\n".join(descriptions)
 
 
+@lru_cache(maxsize=1)
+def _reference_img() -> Image.Image:
+    """Carga y decodifica la imagen de referencia una sola vez por proceso."""
+    # Abrir directamente: un solo syscall en vez de exists() + open()
+    try:
+        img = Image.open(REFERENCE_IMAGE)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"No se encontró imagen de referencia: {REFERENCE_IMAGE}") from None
+    img.load()  # decodificar ya; la imagen es inmutable y se comparte entre llamadas
+    return img
+
+
 def generate_thumbnail_image(topic: str, keywords: list, reference_img: Image.Image) -> Image.Image:
     """Genera la imagen del thumbnail usando Gemini."""
 
@@ -171,13 +235,28 @@ def generate_thumbnail_image(topic: str, keywords: list, reference_img: Image.Im
     if response.candidates and response.candidates[0].content:
         for part in response.candidates[0].content.parts:
             if hasattr(part, 'inline_data') and part.inline_data:
-                image_data = part.inline_data.data
-                if isinstance(image_data, str):
-                    image_data = base64.b64decode(image_data)
-
-                img = Image.open(io.BytesIO(image_data))
-                img = img.resize((TARGET_WIDTH, TARGET_HEIGHT), Image.Resampling.LANCZOS)
-                if img.mode != 'RGB':
+                raw = part.inline_data.data
+                if isinstance(raw, str):
+                    raw = base64.b64decode(raw, validate=False)
+
+                img = Image.open(io.BytesIO(raw))
+                # Para fuentes JPEG, draft() deja que libjpeg decodifique ya
+                # reducido a nivel DCT en vez de descodificar a resolución completa
+                if img.format == 'JPEG':
+                    img.draft('RGB', (TARGET_WIDTH, TARGET_HEIGHT))
+                img.load()  # decodificar ya para poder liberar el buffer de entrada
+                del raw
+                if img.mode not in ('RGB', 'RGBA'):
+                    img = img.convert('RGB')
+                if img.size != (TARGET_WIDTH, TARGET_HEIGHT):
+                    # reducing_gap: pre-reducción barata con filtro de caja y
+                    # LANCZOS solo en el último tramo del downscale
+                    img = img.resize(
+                        (TARGET_WIDTH, TARGET_HEIGHT),
+                        Image.Resampling.LANCZOS,
+                        reducing_gap=3.0,
+                    )
+                if img.mode == 'RGBA':
                     img = img.convert('RGB')
                 return img
 
@@ -187,7 +266,6 @@ def generate_thumbnail_image(topic: str, keywords: list, reference_img: Image.Im
 def add_text_overlays(img: Image.Image, episode: int, topic: str) -> Image.Image:
     """Añade las etiquetas de texto (episodio y tema)."""
 
-    draw = ImageDraw.Draw(img)
     font_ep = load_font(48)
     font_topic = load_font(36)
 
@@ -195,6 +273,19 @@ def add_text_overlays(img: Image.Image, episode: int, topic: str) -> Image.Image
     black = (0, 0, 0)
     yellow = (255, 220, 0)
 
+    # Trabajar en RGBA todo el rato, con overlays recortados al bbox de cada
+    # etiqueta: se componen ~15K píxeles por fondo en vez del frame completo
+    img = img.convert('RGBA')
+    draw = ImageDraw.Draw(img)
+
+    def _blend_label_bg(x0, y0, x1, y1, radius, fill):
+        overlay = Image.new('RGBA', (x1 - x0, y1 - y0), (0, 0, 0, 0))
+        overlay_draw = ImageDraw.Draw(overlay)
+        overlay_draw.rounded_rectangle(
+            [(0, 0), (x1 - x0 - 1, y1 - y0 - 1)], radius=radius, fill=fill
+        )
+        img.alpha_composite(overlay, (x0, y0))
+
     # Número de episodio (esquina superior derecha)
     ep_text = f"EP {episode:02d}"
     bbox = draw.textbbox((0, 0), ep_text, font=font_ep)
@@ -203,16 +294,7 @@ def add_text_overlays(img: Image.Image, episode: int, topic: str) -> Image.Image
     ep_y = 20
 
     # Fondo negro para episodio
-    overlay = Image.new('RGBA', img.size, (0, 0, 0, 0))
-    overlay_draw = ImageDraw.Draw(overlay)
-    overlay_draw.rounded_rectangle(
-        [(ep_x - 18, ep_y - 8), (ep_x + ep_width + 18, ep_y + 58)],
-        radius=12,
-        fill=(0, 0, 0, 200)
-    )
-    img = Image.alpha_composite(img.convert('RGBA'), overlay).convert('RGB')
-    draw = ImageDraw.Draw(img)
-    add_text_with_outline(draw, ep_text, (ep_x, ep_y), font_ep, yellow, black, 3)
+    _blend_label_bg(ep_x - 18, ep_y - 8, ep_x + ep_width + 18, ep_y + 58, 12, (0, 0, 0, 200))
 
     # Tema (esquina superior izquierda) - máximo 25 caracteres
     topic_display = topic[:25] if len(topic) > 25 else topic
@@ -220,18 +302,12 @@ def add_text_overlays(img: Image.Image, episode: int, topic: str) -> Image.Image
     topic_width = bbox[2] - bbox[0]
 
     # Fondo naranja para tema
-    overlay2 = Image.new('RGBA', img.size, (0, 0, 0, 0))
-    overlay2_draw = ImageDraw.Draw(overlay2)
-    overlay2_draw.rounded_rectangle(
-        [(15, 15), (topic_width + 55, 68)],
-        radius=10,
-        fill=(255, 140, 0, 230)
-    )
-    img = Image.alpha_composite(img.convert('RGBA'), overlay2).convert('RGB')
-    draw = ImageDraw.Draw(img)
+    _blend_label_bg(15, 15, topic_width + 55, 68, 10, (255, 140, 0, 230))
+
+    add_text_with_outline(draw, ep_text, (ep_x, ep_y), font_ep, yellow, black, 3)
     add_text_with_outline(draw, topic_display, (32, 22), font_topic, white, black, 2)
 
-    return img
+    return img.convert('RGB')
 
 
 def generate_thumbnail(video_id: str, title: str, output_dir: Path = None) -> Path:
@@ -250,11 +326,8 @@ def generate_thumbnail(video_id: str, title: str, output_dir: Path = None) -> Pa
     print(f"  Tema: {topic}")
     print(f"  Keywords: {', '.join(keywords)}")
 
-    # Cargar imagen de referencia
-    if not REFERENCE_IMAGE.exists():
-        raise FileNotFoundError(f"No se encontró imagen de referencia: {REFERENCE_IMAGE}")
-
-    reference_img = Image.open(REFERENCE_IMAGE)
+    # Cargar imagen de referencia (decodificada una vez y compartida)
+    reference_img = _reference_img()
 
     # Generar imagen con Gemini
     print(f"  Generando imagen con {GEMINI_IMAGE_MODEL}...")
@@ -269,9 +342,10 @@ def generate_thumbnail(video_id: str, title: str, output_dir: Path = None) -> Pa
     print(f"  Añadiendo etiquetas de texto...")
     img = add_text_overlays(img, episode, topic)
 
-    # Guardar
+    # Guardar: una sola pasada de codificación (optimize=True codifica dos
+    # veces para elegir tablas Huffman) y chroma 4:2:0, imperceptible a 1280x720
     output_path = output_dir / f"{video_id}.jpg"
-    img.save(output_path, "JPEG", quality=90, optimize=True)
+    img.save(output_path, "JPEG", quality=88, optimize=False, progressive=False, subsampling=2)
 
     file_size = output_path.stat().st_size
     print(f"  Guardado: {output_path} ({file_size / 1024:.1f} KB)")
@@ -279,6 +353,31 @@ def generate_thumbnail(video_id: str, title: str, output_dir: Path = None) -> Pa
     return output_path
 
 
+def generate_thumbnails_batch(pairs, workers=6):
+    """Genera thumbnails de varios episodios en paralelo.
+
+    La llamada a Gemini es I/O-bound (segundos por imagen), así que un pool
+    de hilos solapa las peticiones HTTP: regenerar los 30 episodios pasa de
+    sumar latencias a aproximarse a latencia_máxima * lotes.
+
+    Args:
+        pairs: Iterable de tuplas (video_id, titulo)
+        workers: Hilos simultáneos (mantener acorde a la cuota RPM de Gemini)
+
+    Yields:
+        Tuplas (video_id, Path del thumbnail generado)
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(generate_thumbnail, video_id, title): video_id
+            for video_id, title in pairs
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
 def main():
     """Función principal."""
     print("=" * 60)
@@ -305,18 +404,17 @@ def main():
         title = sys.argv[2]
     elif len(sys.argv) == 2:
         video_id = sys.argv[1]
-        # Buscar título en metadata
-        if METADATA_FILE.exists():
-            with open(METADATA_FILE, 'r') as f:
-                metadata = json.load(f)
-            if video_id in metadata:
-                title = metadata[video_id].get('title', '')
-            else:
-                print(f"ERROR: Video {video_id} no encontrado en metadata")
-                sys.exit(1)
-        else:
+        # Buscar título en metadata (leer directamente, sin exists() previo)
+        try:
+            metadata = _json_loads(METADATA_FILE.read_bytes())
+        except FileNotFoundError:
             print("ERROR: Proporciona el título como segundo argumento")
             sys.exit(1)
+        if video_id in metadata:
+            title = metadata[video_id].get('title', '')
+        else:
+            print(f"ERROR: Video {video_id} no encontrado en metadata")
+            sys.exit(1)
     else:
         print("Uso: python generate_thumbnail_g33k.py <video_id> [titulo]")
         print("Ejemplo: python generate_thumbnail_g33k.py YMCWOLzaIGQ 'G33K TEAM - S1E31 | Mi Título'")
@@ -31,18 +31,45 @@ import argparse
 import json
 import re
 import sys
-import time
-import base64
 import io
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
 
-# Importar notificaciones de Telegram
+from PIL import Image, ImageDraw, ImageFont
+from googleapiclient.http import MediaFileUpload
+
+# pybase64 (opcional) decodifica base64 con SIMD, ~20x más rápido que stdlib
+try:
+    from pybase64 import b64decode as _b64decode
+except ImportError:
+    from base64 import b64decode as _b64decode
+
+# orjson (opcional) es 2-5x más rápido que json y emite UTF-8 directamente
 try:
-    from src.notifications.telegram import notify_video_processed, notify_error
-    TELEGRAM_AVAILABLE = True
+    import orjson
+
+    def _json_loads(data):
+        return orjson.loads(data)
+
+    def _json_dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+    def _json_dumps_line(obj) -> bytes:
+        return orjson.dumps(obj) + b'\n'
+
 except ImportError:
-    TELEGRAM_AVAILABLE = False
+    def _json_loads(data):
+        return json.loads(data)
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, indent=2,
+                          separators=(',', ': ')).encode('utf-8')
+
+    def _json_dumps_line(obj) -> bytes:
+        return (json.dumps(obj, ensure_ascii=False) + '\n').encode('utf-8')
 
 # Configuración de rutas
 BASE_DIR = Path(__file__).parent
@@ -50,6 +77,8 @@ DATA_DIR = BASE_DIR / "data"
 TRANSCRIPTS_DIR = DATA_DIR / "transcripts"
 THUMBNAILS_DIR = DATA_DIR / "thumbnails"
 CHAPTERS_FILE = DATA_DIR / "chapters_youtube.json"
+CHAPTERS_JSONL = DATA_DIR / "chapters_youtube.jsonl"
+NEWSLETTER_INDEX = DATA_DIR / "newsletter_index.json"
 
 # Modelos de Gemini
 GEMINI_TEXT_MODEL = "models/gemini-2.0-flash"
@@ -58,22 +87,58 @@ GEMINI_IMAGE_MODEL = "models/gemini-3-pro-image-preview"
 # Imagen de referencia para thumbnails (EP30)
 REFERENCE_THUMBNAIL = THUMBNAILS_DIR / "ut9FDl0vFh4.jpg"
 
-
+# Patrones precompilados (se ejecutan por cada título/chapter procesado)
+# Prefijo de serie y emojis se eliminan en una sola pasada de sub()
+_TITLE_CLEAN_RE = re.compile(r'G33K TEAM - S1E\d+ \| |[🎙️💻🤯🚀🧠💡♨️🤖📱⚡🎧🛠️⏰🎮🌐🔒💸🍕🦶💾🔄✨👴📉⚠️☁️👨‍💼🏢⚖️💰🔥]')
+_SPLIT_RE = re.compile(r'[:,&+]|\s+y\s+')
+# El tema principal solo corta en ':' y ',': '&', '+' y ' y ' forman parte
+# del tema visible en el thumbnail ("IA & Robots"), no son separadores
+_TOPIC_SPLIT_RE = re.compile(r'[:,]')
+_EP_RE = re.compile(r'S1E(\d+)')
+_EP_PREFIX_RE = re.compile(r'^G33K TEAM - S1E(\d+) \| ')
+_TS_RE = re.compile(r'^\s*\d+:\d+')
+
+
+def _parse_title(title):
+    """Extrae número de episodio y resto del título en un solo escaneo."""
+    match = _EP_PREFIX_RE.match(title)
+    if match:
+        return int(match.group(1)), title[match.end():]
+    # Sin prefijo estándar: buscar S1EXX suelto en el título
+    match = _EP_RE.search(title)
+    return (int(match.group(1)) if match else 99), title
+
+
+@lru_cache(maxsize=1)
 def load_env():
-    """Carga variables de entorno desde .env"""
+    """Carga variables de entorno desde .env (una sola lectura por proceso)"""
     env_path = BASE_DIR / ".env"
     env_vars = {}
     if env_path.exists():
-        with open(env_path) as f:
-            for line in f:
-                if '=' in line and not line.startswith('#'):
-                    key, value = line.strip().split('=', 1)
-                    env_vars[key] = value
+        for line in env_path.read_text(encoding="utf-8").splitlines():
+            if not line or line.startswith('#') or '=' not in line:
+                continue
+            key, _, value = line.partition('=')
+            env_vars[key.strip()] = value.strip()
     return env_vars
 
 
+def _telegram():
+    """Importa el módulo de notificaciones solo cuando se va a notificar.
+
+    Evita pagar el import de `requests` en subcomandos que no notifican
+    (--listar, --solo-chapters, etc.).
+    """
+    try:
+        from src.notifications import telegram
+        return telegram
+    except ImportError:
+        return None
+
+
+@lru_cache(maxsize=1)
 def get_youtube_client():
-    """Obtiene cliente autenticado de YouTube API."""
+    """Obtiene cliente autenticado de YouTube API (uno por proceso)."""
     from googleapiclient.discovery import build
     from google.oauth2.credentials import Credentials
 
@@ -92,8 +157,9 @@ def get_youtube_client():
     return build('youtube', 'v3', credentials=credentials)
 
 
+@lru_cache(maxsize=1)
 def get_gemini_client():
-    """Configura y retorna cliente de Gemini."""
+    """Configura y retorna cliente de Gemini (configure corre una sola vez)."""
     import google.generativeai as genai
 
     env = load_env()
@@ -118,7 +184,9 @@ def listar_videos_recientes(limit=10):
         forMine=True,
         type='video',
         order='date',
-        maxResults=limit
+        maxResults=limit,
+        # Respuesta parcial: solo los campos que se leen abajo
+        fields='items(id/videoId,snippet(title,publishedAt))'
     ).execute()
 
     print(f"\n📺 Últimos {limit} videos del canal:")
@@ -142,7 +210,8 @@ def obtener_ultimo_video():
         forMine=True,
         type='video',
         order='date',
-        maxResults=1
+        maxResults=1,
+        fields='items(id/videoId,snippet(title,publishedAt))'
     ).execute()
 
     if response['items']:
@@ -161,7 +230,8 @@ def obtener_info_video(video_id):
 
     response = youtube.videos().list(
         part='snippet,status',
-        id=video_id
+        id=video_id,
+        fields='items(snippet(title,description,publishedAt))'
     ).execute()
 
     if response['items']:
@@ -203,31 +273,30 @@ def descargar_transcripcion(video_id):
         transcript = list(transcript_list)[0].fetch()
 
     # Guardar TXT
-    txt_content = ' '.join([entry.text for entry in transcript])
+    txt_content = ' '.join(entry.text for entry in transcript)
     txt_path = TRANSCRIPTS_DIR / f"{video_id}.txt"
     with open(txt_path, 'w', encoding='utf-8') as f:
         f.write(txt_content)
 
-    # Guardar SRT
-    srt_content = ''
-    for i, entry in enumerate(transcript, 1):
-        start = entry.start
-        duration = entry.duration if entry.duration else 2
-        end = start + duration
-
-        start_h, start_m = int(start // 3600), int((start % 3600) // 60)
-        start_s, start_ms = int(start % 60), int((start % 1) * 1000)
-        end_h, end_m = int(end // 3600), int((end % 3600) // 60)
-        end_s, end_ms = int(end % 60), int((end % 1) * 1000)
-
-        srt_content += f'{i}\n'
-        srt_content += f'{start_h:02d}:{start_m:02d}:{start_s:02d},{start_ms:03d} --> '
-        srt_content += f'{end_h:02d}:{end_m:02d}:{end_s:02d},{end_ms:03d}\n'
-        srt_content += f'{entry.text}\n\n'
-
+    # Guardar SRT (escribir cada segmento directamente, sin concatenar strings)
     srt_path = TRANSCRIPTS_DIR / f"{video_id}.srt"
     with open(srt_path, 'w', encoding='utf-8') as f:
-        f.write(srt_content)
+        for i, entry in enumerate(transcript, 1):
+            start = entry.start
+            duration = entry.duration if entry.duration else 2
+            end = start + duration
+
+            start_h, start_m = int(start // 3600), int((start % 3600) // 60)
+            start_s, start_ms = int(start % 60), int((start % 1) * 1000)
+            end_h, end_m = int(end // 3600), int((end % 3600) // 60)
+            end_s, end_ms = int(end % 60), int((end % 1) * 1000)
+
+            f.write(
+                f'{i}\n'
+                f'{start_h:02d}:{start_m:02d}:{start_s:02d},{start_ms:03d} --> '
+                f'{end_h:02d}:{end_m:02d}:{end_s:02d},{end_ms:03d}\n'
+                f'{entry.text}\n\n'
+            )
 
     print(f"  ✅ TXT: {txt_path.name} ({len(txt_content)} chars)")
     print(f"  ✅ SRT: {srt_path.name} ({len(transcript)} segmentos)")
@@ -239,6 +308,30 @@ def descargar_transcripcion(video_id):
 # 2. CHAPTERS
 # =============================================================================
 
+def cargar_chapters():
+    """Carga todos los chapters: JSON compactado + appends pendientes del JSONL."""
+    all_chapters = {}
+    if CHAPTERS_FILE.exists():
+        all_chapters = _json_loads(CHAPTERS_FILE.read_bytes())
+    if CHAPTERS_JSONL.exists():
+        with open(CHAPTERS_JSONL, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    entry = _json_loads(line)
+                    all_chapters[entry['video_id']] = entry['chapters']
+    return all_chapters
+
+
+def compact_chapters():
+    """Reconstruye el JSON legible desde el JSONL incremental y lo vacía."""
+    all_chapters = cargar_chapters()
+    CHAPTERS_FILE.write_bytes(_json_dumps(all_chapters))
+    if CHAPTERS_JSONL.exists():
+        CHAPTERS_JSONL.unlink()
+    return all_chapters
+
+
 def generar_chapters(video_id, titulo):
     """Genera chapters usando Gemini."""
     genai = get_gemini_client()
@@ -254,23 +347,27 @@ def generar_chapters(video_id, titulo):
     with open(txt_path, 'r') as f:
         transcript = f.read()
 
-    # Dividir transcripción para cubrir todo el video
-    part1 = transcript[:20000]
-    part2 = transcript[20000:40000]
-    part3 = transcript[40000:]
+    # Muestrear inicio/medio/final cortando directamente al tamaño final
+    # (sin los cortes intermedios de 20K chars que se descartaban enseguida)
+    part1 = transcript[:6000]
+    part2 = transcript[20000:26000]
+    part3 = transcript[40000:46000]
+    if not part3 and len(transcript) > 6000:
+        # Transcripción corta: cubrir igualmente el final real del video
+        part3 = transcript[-6000:]
 
     prompt = f"""Analiza esta transcripción COMPLETA de un podcast de tecnología (G33K TEAM) y genera capítulos para YouTube.
 
 TÍTULO: {titulo}
 
 PARTE 1 (inicio):
-{part1[:6000]}
+{part1}
 
 PARTE 2 (medio):
-{part2[:6000]}
+{part2}
 
 PARTE 3 (final):
-{part3[:6000]}
+{part3}
 
 Genera 6-8 capítulos que cubran TODO el video en este formato:
 0:00 🎙️ Título del capítulo
@@ -289,29 +386,24 @@ CAPÍTULOS:"""
     model = genai.GenerativeModel(GEMINI_TEXT_MODEL)
     response = model.generate_content(prompt)
 
-    chapters = response.text.strip()
-
-    # Limpiar respuesta (quitar texto introductorio si existe)
-    lines = chapters.split('\n')
-    clean_lines = [l for l in lines if re.match(r'^\d+:\d+', l.strip())]
-    chapters = '\n'.join(clean_lines) if clean_lines else chapters
+    # Limpiar respuesta (quitar texto introductorio si existe); un solo split
+    # reutilizado para el filtrado y la vista previa
+    lines = response.text.strip().split('\n')
+    clean_lines = [l for l in lines if _TS_RE.match(l)]
+    shown = clean_lines or lines
+    chapters = '\n'.join(shown)
 
     print(f"  ✅ Chapters generados:")
-    for line in chapters.split('\n')[:5]:
+    for line in shown[:5]:
         print(f"      {line}")
-    if len(chapters.split('\n')) > 5:
-        print(f"      ... +{len(chapters.split(chr(10))) - 5} más")
+    if len(shown) > 5:
+        print(f"      ... +{len(shown) - 5} más")
 
-    # Guardar en archivo JSON
-    all_chapters = {}
-    if CHAPTERS_FILE.exists():
-        with open(CHAPTERS_FILE, 'r') as f:
-            all_chapters = json.load(f)
-
-    all_chapters[video_id] = chapters
-
-    with open(CHAPTERS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(all_chapters, f, indent=2, ensure_ascii=False)
+    # Guardado incremental: una línea por episodio en vez de reparsear y
+    # reescribir el JSON completo en cada llamada (compact_chapters lo compacta)
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    with open(CHAPTERS_JSONL, 'ab') as f:
+        f.write(_json_dumps_line({'video_id': video_id, 'chapters': chapters}))
 
     return chapters
 
@@ -332,8 +424,7 @@ def generar_titulo(video_id, titulo_actual):
         transcript = f.read()[:8000]
 
     # Extraer número de episodio
-    match = re.search(r'S1E(\d+)', titulo_actual)
-    episode = int(match.group(1)) if match else 99
+    episode = _parse_title(titulo_actual)[0]
 
     prompt = f"""Analiza esta transcripción y genera un título optimizado para YouTube.
 
@@ -373,7 +464,10 @@ Genera SOLO el título:"""
 # 4. THUMBNAIL
 # =============================================================================
 
-THUMBNAIL_PROMPT = """Generate a YouTube thumbnail image in the EXACT same style as this reference image.
+# El prompt se divide en prefijo estático (idéntico en todas las llamadas,
+# cacheable por Gemini) y cola dinámica por episodio. La parte variable va
+# SIEMPRE al final para que el caché de prefijos pueda reutilizar el resto.
+THUMBNAIL_PROMPT_STATIC = """Generate a YouTube thumbnail image in the EXACT same style as this reference image.
 
 CRITICAL - COPY THIS EXACT STYLE:
 - Same 5 cartoon characters at the bottom (bald guy with grey beard and glasses, guy with dark hair and beard in brown shirt, bald guy with glasses and beard in plaid, guy with headphones and beard, slim guy with glasses in black)
@@ -381,13 +475,9 @@ CRITICAL - COPY THIS EXACT STYLE:
 - Same cartoon/flat illustration style
 - Same layout with monitors/screens in background showing topic keywords
 
-TOPIC FOR THIS EPISODE: "{topic}"
-KEYWORDS: {keywords}
-
 REQUIREMENTS:
 - Size: 1280x720 pixels (16:9)
-- TOP 60%: Tech workspace with 3-5 monitors showing topic-related content:
-{monitors_description}
+- TOP 60%: Tech workspace with 3-5 monitors showing topic-related content (see MONITOR CONTENT below)
 - Add some tech items on desk (keyboards, cables, coffee cup, tablets)
 - BOTTOM 40%: The EXACT same 5 characters from reference, same positions, same appearance
 - Same beige/brown warm background as reference
@@ -396,29 +486,103 @@ REQUIREMENTS:
 
 Generate an image that looks like it's from the same series as the reference."""
 
+THUMBNAIL_PROMPT_DYNAMIC = """TOPIC FOR THIS EPISODE: "{topic}"
+KEYWORDS: {keywords}
+MONITOR CONTENT:
+{monitors_description}"""
+
+
+# TTL del CachedContent remoto y margen de seguridad: la memo de proceso se
+# invalida un poco ANTES de que el caché caduque en el servicio, para no
+# llegar a llamar generate_content contra un caché ya expirado
+_THUMBNAIL_CACHE_TTL = 3600
+_THUMBNAIL_CACHE_MARGIN = 300
+_thumbnail_model_memo = None  # (model, cached, reference_img, created_at)
+
+
+def _thumbnail_model(force_uncached: bool = False):
+    """Modelo de imagen con la referencia + prompt estático en caché.
+
+    Intenta registrar la imagen de referencia y el prefijo estático como
+    CachedContent explícito (se paga/envía una sola vez por proceso en vez
+    de en cada thumbnail). Si el servicio lo rechaza (p. ej. el contenido
+    no llega al mínimo de tokens cacheables), cae al modelo normal y el
+    prefijo viaja en cada llamada — al ir siempre primero, el caché
+    implícito de prefijos de Gemini aún puede aplicarse.
+
+    La memo de proceso respeta el TTL del CachedContent (3600s): pasado el
+    plazo (con margen) se recrea el caché en vez de servir uno expirado,
+    que haría fallar todas las generaciones hasta reiniciar el proceso.
+
+    Args:
+        force_uncached: Ignora/descarta la memo y devuelve el modelo sin
+            CachedContent (fallback cuando un caché expiró a mitad de uso)
+
+    Returns:
+        (model, cached, reference_img)
+    """
+    global _thumbnail_model_memo
+
+    memo = _thumbnail_model_memo
+    if memo is not None and not force_uncached:
+        model, cached, reference_img, created_at = memo
+        fresh = time.monotonic() - created_at < _THUMBNAIL_CACHE_TTL - _THUMBNAIL_CACHE_MARGIN
+        if not cached or fresh:
+            return model, cached, reference_img
+        # CachedContent a punto de expirar: recrear abajo reutilizando la
+        # referencia ya decodificada
+    elif memo is not None:
+        reference_img = memo[2]
+    else:
+        reference_img = None
 
-def generar_thumbnail(video_id, titulo):
-    """Genera thumbnail usando Gemini 3 Pro."""
-    from PIL import Image, ImageDraw, ImageFont
     genai = get_gemini_client()
 
+    if reference_img is None:
+        try:
+            reference_img = Image.open(REFERENCE_THUMBNAIL)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Imagen de referencia no encontrada: {REFERENCE_THUMBNAIL}") from None
+        # Decodificar ya los píxeles: al vivir en esta memo de proceso, la
+        # referencia solo se decodifica una vez por muchas llamadas
+        reference_img.load()
+
+    if force_uncached:
+        model, cached = genai.GenerativeModel(GEMINI_IMAGE_MODEL), False
+    else:
+        try:
+            cache = genai.caching.CachedContent.create(
+                model=GEMINI_IMAGE_MODEL,
+                contents=[reference_img, THUMBNAIL_PROMPT_STATIC],
+                ttl=f"{_THUMBNAIL_CACHE_TTL}s"
+            )
+            model, cached = genai.GenerativeModel.from_cached_content(cache), True
+        except Exception:
+            model, cached = genai.GenerativeModel(GEMINI_IMAGE_MODEL), False
+
+    _thumbnail_model_memo = (model, cached, reference_img, time.monotonic())
+    return model, cached, reference_img
+
+
+def generar_thumbnail(video_id, titulo, con_textos=True):
+    """Genera thumbnail usando Gemini 3 Pro.
+
+    Con con_textos=False (regeneraciones sin etiquetas) y si Gemini ya
+    devuelve un JPEG 1280x720, los bytes se escriben tal cual a disco sin
+    pagar el ciclo decodificar→reencodar.
+    """
     print(f"\n🖼️ Generando thumbnail con {GEMINI_IMAGE_MODEL}...")
 
     THUMBNAILS_DIR.mkdir(parents=True, exist_ok=True)
 
     # Extraer tema y keywords del título
-    clean = re.sub(r'G33K TEAM - S1E\d+ \| ', '', titulo)
-    clean = re.sub(r'[🎙️💻🤯🚀🧠💡♨️🤖📱⚡🎧🛠️⏰🎮🌐🔒💸🍕🦶💾🔄✨👴📉⚠️☁️👨‍💼🏢⚖️💰🔥]', '', clean)
+    clean = _TITLE_CLEAN_RE.sub('', titulo)
 
-    parts = re.split(r'[:\,]', clean)
-    topic = parts[0].strip()[:35] if parts else clean[:35]
+    # Tema con sus delimitadores originales (solo ':' y ','); las keywords
+    # usan el split amplio (incluye '&', '+' y ' y ')
+    topic = _TOPIC_SPLIT_RE.split(clean, 1)[0].strip()[:35]
 
-    keywords = []
-    for part in clean.replace(':', ',').replace('&', ',').replace('+', ',').split(','):
-        kw = part.strip()
-        if kw and len(kw) > 2:
-            keywords.append(kw)
-    keywords = keywords[:5]
+    keywords = [kw for kw in (p.strip() for p in _SPLIT_RE.split(clean)) if len(kw) > 2][:5]
 
     # Descripción de monitores
     monitors = []
@@ -430,21 +594,25 @@ def generar_thumbnail(video_id, titulo):
     print(f"  Tema: {topic}")
     print(f"  Keywords: {', '.join(keywords)}")
 
-    # Cargar imagen de referencia
-    if not REFERENCE_THUMBNAIL.exists():
-        raise FileNotFoundError(f"Imagen de referencia no encontrada: {REFERENCE_THUMBNAIL}")
-
-    reference_img = Image.open(REFERENCE_THUMBNAIL)
-
-    # Generar con Gemini
-    prompt = THUMBNAIL_PROMPT.format(
+    # Generar con Gemini: solo la cola dinámica si el prefijo está cacheado
+    model, cached, reference_img = _thumbnail_model()
+    dynamic = THUMBNAIL_PROMPT_DYNAMIC.format(
         topic=topic,
         keywords=", ".join(keywords),
         monitors_description=monitors_desc
     )
 
-    model = genai.GenerativeModel(GEMINI_IMAGE_MODEL)
-    response = model.generate_content([prompt, reference_img])
+    if cached:
+        try:
+            response = model.generate_content([dynamic])
+        except Exception as e:
+            # El CachedContent pudo expirar entre el chequeo del TTL y la
+            # llamada: reintentar una vez por la vía sin caché
+            print(f"  ⚠️ Caché de contexto no disponible ({e}), reintentando sin caché...")
+            model, cached, reference_img = _thumbnail_model(force_uncached=True)
+            response = model.generate_content([THUMBNAIL_PROMPT_STATIC, reference_img, dynamic])
+    else:
+        response = model.generate_content([THUMBNAIL_PROMPT_STATIC, reference_img, dynamic])
 
     # Extraer imagen de la respuesta
     img = None
@@ -453,10 +621,34 @@ def generar_thumbnail(video_id, titulo):
             if hasattr(part, 'inline_data') and part.inline_data:
                 image_data = part.inline_data.data
                 if isinstance(image_data, str):
-                    image_data = base64.b64decode(image_data)
-
-                img = Image.open(io.BytesIO(image_data))
-                img = img.resize((1280, 720), Image.Resampling.LANCZOS)
+                    # Normalmente inline_data.data ya llega en bytes;
+                    # decodificar base64 solo cuando de verdad es str
+                    image_data = _b64decode(image_data, validate=False)
+
+                # Atajo: si no hay que dibujar textos y los bytes ya son un
+                # JPEG 1280x720 (solo se lee la cabecera, sin decodificar
+                # píxeles), se escriben tal cual a disco
+                if not con_textos and image_data[:3] == b'\xff\xd8\xff':
+                    with io.BytesIO(image_data) as buf:
+                        size = Image.open(buf).size
+                    if size == (1280, 720):
+                        output_path = THUMBNAILS_DIR / f"{video_id}.jpg"
+                        output_path.write_bytes(image_data)
+                        print(f"  ✅ Guardado sin reencodar: {output_path.name} ({len(image_data) / 1024:.1f} KB)")
+                        return output_path
+
+                with io.BytesIO(image_data) as buf:
+                    img = Image.open(buf)
+                    # Para fuentes JPEG, draft() deja que libjpeg decodifique ya
+                    # reducido a nivel DCT antes del LANCZOS final
+                    if img.format == 'JPEG':
+                        img.draft('RGB', (1280, 720))
+                    img.load()  # decodificar dentro del with para liberar el buffer
+                if img.size != (1280, 720):
+                    # reducing_gap: reducción rápida previa + LANCZOS solo
+                    # en el último tramo, misma calidad visual
+                    img = img.resize((1280, 720), Image.Resampling.LANCZOS,
+                                     reducing_gap=3.0)
                 if img.mode != 'RGB':
                     img = img.convert('RGB')
                 print("  ✅ Imagen generada")
@@ -466,45 +658,49 @@ def generar_thumbnail(video_id, titulo):
         raise Exception("No se pudo generar la imagen")
 
     # Añadir textos (episodio y tema)
-    img = _añadir_textos_thumbnail(img, titulo, topic)
+    if con_textos:
+        img = _añadir_textos_thumbnail(img, titulo, topic)
 
     # Guardar
     output_path = THUMBNAILS_DIR / f"{video_id}.jpg"
-    img.save(output_path, "JPEG", quality=90, optimize=True)
+    # Sin optimize: la segunda pasada Huffman duplica el tiempo de encode
+    # por un ~3-5% de tamaño que YouTube descarta al reencodar
+    img.save(output_path, "JPEG", quality=88, progressive=True, subsampling=2)
 
     print(f"  ✅ Guardado: {output_path.name} ({output_path.stat().st_size / 1024:.1f} KB)")
 
     return output_path
 
 
+@lru_cache(maxsize=16)
+def _load_font(size):
+    """Carga fuente del sistema (cacheada por tamaño)."""
+    for path in ["/System/Library/Fonts/Supplemental/Impact.ttf",
+                 "/System/Library/Fonts/Supplemental/Arial Bold.ttf"]:
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
 def _añadir_textos_thumbnail(img, titulo, topic):
     """Añade etiquetas de texto al thumbnail."""
-    from PIL import Image, ImageDraw, ImageFont
-
     # Extraer episodio
-    match = re.search(r'S1E(\d+)', titulo)
-    episode = int(match.group(1)) if match else 99
-
-    def load_font(size):
-        for path in ["/System/Library/Fonts/Supplemental/Impact.ttf",
-                     "/System/Library/Fonts/Supplemental/Arial Bold.ttf"]:
-            try:
-                return ImageFont.truetype(path, size)
-            except:
-                continue
-        return ImageFont.load_default()
+    episode = _parse_title(titulo)[0]
 
     def add_text_outline(draw, text, pos, font, fill, outline, width=3):
-        x, y = pos
-        for dx in range(-width, width + 1):
-            for dy in range(-width, width + 1):
-                if dx != 0 or dy != 0:
-                    draw.text((x + dx, y + dy), text, font=font, fill=outline)
-        draw.text(pos, text, font=font, fill=fill)
-
-    draw = ImageDraw.Draw(img)
-    font_ep = load_font(48)
-    font_topic = load_font(36)
+        # Stroke nativo de Pillow: un solo rasterizado en vez de 49 draw.text.
+        # Internamente es el pipeline getmask2 + blit de máscara en C (un
+        # único pase que cubre contorno y relleno con sus dos colores)
+        draw.text(pos, text, font=font, fill=fill, stroke_width=width, stroke_fill=outline)
+
+    # Trabajar en RGBA y dibujar los fondos con blending directo sobre el
+    # lienzo (modo 'RGBA' del Draw): sin overlays completos ni composites
+    img = img.convert('RGBA')
+    draw = ImageDraw.Draw(img, 'RGBA')
+    font_ep = _load_font(48)
+    font_topic = _load_font(36)
 
     # Episodio (esquina superior derecha)
     ep_text = f"EP {episode:02d}"
@@ -513,14 +709,10 @@ def _añadir_textos_thumbnail(img, titulo, topic):
     ep_x = 1280 - ep_width - 45
     ep_y = 20
 
-    overlay = Image.new('RGBA', img.size, (0, 0, 0, 0))
-    overlay_draw = ImageDraw.Draw(overlay)
-    overlay_draw.rounded_rectangle(
+    draw.rounded_rectangle(
         [(ep_x - 18, ep_y - 8), (ep_x + ep_width + 18, ep_y + 58)],
         radius=12, fill=(0, 0, 0, 200)
     )
-    img = Image.alpha_composite(img.convert('RGBA'), overlay).convert('RGB')
-    draw = ImageDraw.Draw(img)
     add_text_outline(draw, ep_text, (ep_x, ep_y), font_ep, (255, 220, 0), (0, 0, 0), 3)
 
     # Tema (esquina superior izquierda)
@@ -528,17 +720,13 @@ def _añadir_textos_thumbnail(img, titulo, topic):
     bbox = draw.textbbox((0, 0), topic_display, font=font_topic)
     topic_width = bbox[2] - bbox[0]
 
-    overlay2 = Image.new('RGBA', img.size, (0, 0, 0, 0))
-    overlay2_draw = ImageDraw.Draw(overlay2)
-    overlay2_draw.rounded_rectangle(
+    draw.rounded_rectangle(
         [(15, 15), (topic_width + 55, 68)],
         radius=10, fill=(255, 140, 0, 230)
     )
-    img = Image.alpha_composite(img.convert('RGBA'), overlay2).convert('RGB')
-    draw = ImageDraw.Draw(img)
     add_text_outline(draw, topic_display, (32, 22), font_topic, (255, 255, 255), (0, 0, 0), 2)
 
-    return img
+    return img.convert('RGB')
 
 
 # =============================================================================
@@ -547,14 +735,17 @@ def _añadir_textos_thumbnail(img, titulo, topic):
 
 def subir_a_youtube(video_id, titulo=None, chapters=None, thumbnail_path=None):
     """Sube título, descripción con chapters y thumbnail a YouTube."""
-    from googleapiclient.http import MediaFileUpload
-
     youtube = get_youtube_client()
 
     print(f"\n📤 Subiendo a YouTube ({video_id})...")
 
-    # Obtener video actual
-    response = youtube.videos().list(part='snippet', id=video_id).execute()
+    # Obtener video actual: pedir exactamente los campos del snippet que el
+    # update() debe conservar (lo que no se reenvía, la API lo borra)
+    response = youtube.videos().list(
+        part='snippet',
+        id=video_id,
+        fields='items(id,snippet(title,description,categoryId,tags,defaultLanguage,defaultAudioLanguage))'
+    ).execute()
 
     if not response['items']:
         raise ValueError(f"Video no encontrado: {video_id}")
@@ -570,8 +761,7 @@ def subir_a_youtube(video_id, titulo=None, chapters=None, thumbnail_path=None):
     # Actualizar descripción con chapters
     if chapters:
         # Extraer episodio
-        match = re.search(r'S1E(\d+)', snippet['title'])
-        episode = int(match.group(1)) if match else 99
+        episode = _parse_title(snippet['title'])[0]
 
         description = f"""⏱️ CAPÍTULOS:
 {chapters}
@@ -596,7 +786,10 @@ def subir_a_youtube(video_id, titulo=None, chapters=None, thumbnail_path=None):
     if thumbnail_path and Path(thumbnail_path).exists():
         youtube.thumbnails().set(
             videoId=video_id,
-            media_body=MediaFileUpload(str(thumbnail_path), mimetype='image/jpeg')
+            # resumable=False: un POST único; el chunking resumible añade
+            # round-trips que no aportan nada para ficheros de <200 KB
+            media_body=MediaFileUpload(str(thumbnail_path), mimetype='image/jpeg',
+                                       resumable=False)
         ).execute()
         print(f"  ✅ Thumbnail subido")
 
@@ -607,90 +800,149 @@ def subir_a_youtube(video_id, titulo=None, chapters=None, thumbnail_path=None):
 # 6. NEWSLETTER
 # =============================================================================
 
-def generar_resumenes_newsletter():
-    """Genera resúmenes de todos los episodios para newsletter."""
-    genai = get_gemini_client()
+def _indice_videos_canal(youtube):
+    """Devuelve {video_id: {title, published}} de todo el canal, con caché.
 
-    print("\n📰 Generando resúmenes para newsletter...")
+    El índice se persiste en newsletter_index.json para que las ejecuciones
+    siguientes no re-paginen todo el historial: la paginación (part='id',
+    respuesta mínima) se corta en cuanto aparece un ID ya indexado, y los
+    títulos de los IDs nuevos se piden en lotes de 50 con videos().list
+    (una sola llamada barata por lote en vez de una por video).
+    """
+    try:
+        index = _json_loads(NEWSLETTER_INDEX.read_bytes())
+    except FileNotFoundError:
+        index = {}
 
-    # Obtener todos los videos
-    youtube = get_youtube_client()
-    all_videos = []
+    # Paginar solo hasta el primer ID ya conocido (orden por fecha desc.)
+    new_ids = []
     next_page = None
-
     while True:
         response = youtube.search().list(
-            part='snippet',
+            part='id',
             forMine=True,
             type='video',
             order='date',
             maxResults=50,
-            pageToken=next_page
+            pageToken=next_page,
+            fields='items(id/videoId),nextPageToken'
         ).execute()
 
+        hit_cached = False
         for item in response['items']:
-            title = item['snippet']['title']
-            if 'G33K TEAM' in title and 'S1E' in title:
-                all_videos.append({
-                    'video_id': item['id']['videoId'],
-                    'title': title,
-                    'published': item['snippet']['publishedAt'][:10]
-                })
+            video_id = item['id']['videoId']
+            if video_id in index:
+                hit_cached = True
+            else:
+                new_ids.append(video_id)
 
         next_page = response.get('nextPageToken')
-        if not next_page:
+        if hit_cached or not next_page:
             break
 
+    # Títulos y fechas de los IDs nuevos, en lotes de 50
+    for i in range(0, len(new_ids), 50):
+        batch = new_ids[i:i + 50]
+        response = youtube.videos().list(
+            part='snippet',
+            id=','.join(batch),
+            fields='items(id,snippet(title,publishedAt))'
+        ).execute()
+        for item in response['items']:
+            index[item['id']] = {
+                'title': item['snippet']['title'],
+                'published': item['snippet']['publishedAt'][:10]
+            }
+
+    if new_ids:
+        NEWSLETTER_INDEX.write_bytes(_json_dumps(index))
+
+    return index
+
+
+def generar_resumenes_newsletter():
+    """Genera resúmenes de todos los episodios para newsletter."""
+    genai = get_gemini_client()
+
+    print("\n📰 Generando resúmenes para newsletter...")
+
+    # Obtener todos los videos (índice incremental persistido)
+    youtube = get_youtube_client()
+    index = _indice_videos_canal(youtube)
+
+    all_videos = [
+        {'video_id': vid, 'title': info['title'], 'published': info['published']}
+        for vid, info in index.items()
+        if 'G33K TEAM' in info['title'] and 'S1E' in info['title']
+    ]
+
     all_videos.sort(key=lambda x: x['published'])
 
     print(f"  Videos encontrados: {len(all_videos)}")
 
     model = genai.GenerativeModel(GEMINI_TEXT_MODEL)
-    summaries = []
 
-    for i, v in enumerate(all_videos):
+    def _resumir(i, v):
         txt_path = TRANSCRIPTS_DIR / f"{v['video_id']}.txt"
 
         if not txt_path.exists():
-            print(f"  [{i+1}/{len(all_videos)}] {v['video_id']} - Sin transcripción")
-            continue
+            return None
 
-        with open(txt_path, 'r') as f:
-            transcript = f.read()[:12000]
+        # Leer solo los primeros 12000 caracteres (read acotado, sin cargar
+        # el fichero entero para luego trocearlo)
+        with txt_path.open('r', encoding='utf-8') as f:
+            transcript = f.read(12000)
 
+        # Cabecera fija primero y transcripción al final: el prefijo
+        # idéntico entre episodios deja actuar al caché de prompts
         prompt = f"""Resume esta transcripción de un podcast de tecnología en español.
-
-TRANSCRIPCIÓN:
-{transcript}
-
 Genera un resumen de 2-3 oraciones (máximo 100 palabras) que capture los temas principales.
-Solo devuelve el resumen:"""
+Solo devuelve el resumen.
 
-        try:
-            response = model.generate_content(prompt)
-            summary = response.text.strip()
+TRANSCRIPCIÓN:
+{transcript}"""
 
-            match = re.search(r'S1E(\d+)', v['title'])
-            episode = int(match.group(1)) if match else i + 1
+        response = model.generate_content(prompt)
+        summary = response.text.strip()
 
-            summaries.append({
-                "episodio": episode,
-                "fecha": v['published'],
-                "titulo": v['title'],
-                "video_id": v['video_id'],
-                "resumen": summary
-            })
+        match = _EP_RE.search(v['title'])
+        episode = int(match.group(1)) if match else i + 1
 
-            print(f"  [{i+1}/{len(all_videos)}] E{episode:02d} ✓")
-            time.sleep(1)
+        return {
+            "episodio": episode,
+            "fecha": v['published'],
+            "titulo": v['title'],
+            "video_id": v['video_id'],
+            "resumen": summary
+        }
 
-        except Exception as e:
-            print(f"  [{i+1}/{len(all_videos)}] Error: {e}")
+    # Las llamadas a Gemini son I/O-bound: un pool acotado solapa las
+    # peticiones en vez del sleep(1) fijo por episodio (los workers
+    # limitan cuántas solicitudes hay en vuelo frente a la cuota RPM)
+    summaries = []
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = {
+            executor.submit(_resumir, i, v): v
+            for i, v in enumerate(all_videos)
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            v = futures[future]
+            try:
+                entry = future.result()
+                if entry is None:
+                    print(f"  [{done}/{len(all_videos)}] {v['video_id']} - Sin transcripción")
+                else:
+                    summaries.append(entry)
+                    print(f"  [{done}/{len(all_videos)}] E{entry['episodio']:02d} ✓")
+            except Exception as e:
+                print(f"  [{done}/{len(all_videos)}] {v['video_id']} Error: {e}")
+
+    # Mantener el orden cronológico del JSON final
+    summaries.sort(key=lambda s: s['episodio'])
 
     # Guardar
     output_path = DATA_DIR / "newsletter_summaries.json"
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(summaries, f, indent=2, ensure_ascii=False)
+    output_path.write_bytes(_json_dumps(summaries))
 
     print(f"\n✅ Guardado: {output_path}")
 
@@ -754,8 +1006,9 @@ def procesar_episodio_completo(video_id):
     print(f"🔗 https://youtube.com/watch?v={video_id}")
 
     # Enviar notificación a Telegram
-    if TELEGRAM_AVAILABLE:
-        notify_video_processed(video_id, nuevo_titulo, success=True)
+    telegram = _telegram()
+    if telegram:
+        telegram.notify_video_processed(video_id, nuevo_titulo, success=True)
         print("📱 Notificación enviada a Telegram")
 
 
@@ -785,6 +1038,8 @@ Ejemplos:
     parser.add_argument('--solo-chapters', action='store_true')
     parser.add_argument('--solo-titulo', action='store_true')
     parser.add_argument('--solo-thumbnail', action='store_true')
+    parser.add_argument('--sin-textos', action='store_true',
+                        help='No añadir textos al thumbnail (con --solo-thumbnail)')
     parser.add_argument('--solo-subir', action='store_true')
 
     args = parser.parse_args()
@@ -831,14 +1086,10 @@ Ejemplos:
             nuevo = generar_titulo(video_id, titulo)
             print(f"\n🏷️ Nuevo título: {nuevo}")
         elif args.solo_thumbnail:
-            generar_thumbnail(video_id, titulo)
+            generar_thumbnail(video_id, titulo, con_textos=not args.sin_textos)
         elif args.solo_subir:
             # Cargar chapters si existen
-            chapters = None
-            if CHAPTERS_FILE.exists():
-                with open(CHAPTERS_FILE, 'r') as f:
-                    all_chapters = json.load(f)
-                chapters = all_chapters.get(video_id)
+            chapters = cargar_chapters().get(video_id)
 
             thumbnail_path = THUMBNAILS_DIR / f"{video_id}.jpg"
             subir_a_youtube(video_id, None, chapters, thumbnail_path if thumbnail_path.exists() else None)
@@ -852,8 +1103,9 @@ Ejemplos:
         traceback.print_exc()
 
         # Notificar error a Telegram
-        if TELEGRAM_AVAILABLE:
-            notify_error(str(e), context=f"video_id: {video_id if 'video_id' in dir() else 'N/A'}")
+        telegram = _telegram()
+        if telegram:
+            telegram.notify_error(str(e), context=f"video_id: {video_id if 'video_id' in dir() else 'N/A'}")
 
         sys.exit(1)
 
@@ -0,0 +1,38 @@
+import re
+from functools import lru_cache
+
+# Frontera de frase: espacio tras . ! ? (compilado una sola vez)
+_SENT_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+
+@lru_cache(maxsize=8)
+def sample_transcript(transcript: str, max_chars: int) -> str:
+    """
+    Recorta la transcripción al presupuesto respetando fronteras de frase
+
+    Un corte a N caracteres fijos parte palabras y, ante cualquier cambio en
+    la cola del texto, produce muestras distintas que rompen la caché de
+    prompts. Cortar en la última frase completa dentro del presupuesto da
+    muestras estables y legibles. Memoizada: reintentos y llamadas repetidas
+    sobre el mismo transcript no vuelven a escanear.
+
+    Args:
+        transcript: Texto completo
+        max_chars: Longitud máxima de la muestra
+
+    Returns:
+        Muestra acotada a max_chars, terminada en frase completa si es posible
+    """
+    if len(transcript) <= max_chars:
+        return transcript
+
+    sample = transcript[:max_chars]
+
+    last_boundary = None
+    for match in _SENT_SPLIT.finditer(sample):
+        last_boundary = match.start()
+
+    if last_boundary:
+        sample = sample[:last_boundary]
+
+    return sample
@@ -0,0 +1,71 @@
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime
+
+from config.settings import settings
+from src.utils.logger import logger
+
+# Caché exacta en disco de respuestas de texto de Gemini, indexada por
+# blake2b de (modelo, prompt). Re-procesar el mismo transcript (replays,
+# pruebas) devuelve la respuesta guardada sin tocar la red ni consumir
+# cuota del rate limiter.
+
+_DB_PATH = settings.DATA_DIR / "gemini_text_cache.db"
+
+_lock = threading.Lock()
+_conn = None
+
+
+def _get_conn() -> sqlite3.Connection:
+    """Abre (una vez por proceso) la conexión y crea la tabla si no existe"""
+    global _conn
+    if _conn is None:
+        settings.ensure_directories()
+        _conn = sqlite3.connect(_DB_PATH, check_same_thread=False)
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS text_cache ("
+            "hash TEXT PRIMARY KEY, "
+            "model TEXT, "
+            "response TEXT, "
+            "created_at TEXT)"
+        )
+        _conn.commit()
+    return _conn
+
+
+def _key(model: str, prompt: str) -> str:
+    # blake2b es ~2x más rápido que SHA-256 en CPU sin SHA-NI, y 16 bytes
+    # de digest bastan de sobra como clave de caché
+    return hashlib.blake2b(f"{model}\x00{prompt}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+def get(model: str, prompt: str) -> str | None:
+    """
+    Busca una respuesta cacheada para (model, prompt)
+
+    Returns:
+        Texto cacheado, o None si no hay entrada
+    """
+    with _lock:
+        row = _get_conn().execute(
+            "SELECT response FROM text_cache WHERE hash = ?",
+            (_key(model, prompt),),
+        ).fetchone()
+
+    if row:
+        logger.debug("Respuesta de texto servida desde caché en disco")
+        return row[0]
+    return None
+
+
+def put(model: str, prompt: str, response: str) -> None:
+    """Guarda la respuesta generada para (model, prompt)"""
+    with _lock:
+        conn = _get_conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO text_cache (hash, model, response, created_at) "
+            "VALUES (?, ?, ?, ?)",
+            (_key(model, prompt), model, response, datetime.now().isoformat()),
+        )
+        conn.commit()
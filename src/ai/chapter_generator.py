@@ -1,13 +1,20 @@
-from src.ai.gemini_client import GeminiClient
+import re
+from bisect import bisect_left
+
+from src.ai.gemini_client import get_gemini_client
 from src.utils.logger import logger
 from config.settings import settings
 
+# Valida MM:SS o HH:MM:SS en una sola pasada (minutos/segundos 0-59);
+# compilado a nivel de módulo para no reparsearlo por cada línea de capítulo
+_TS_VALID_RE = re.compile(r'^\d+:[0-5]?\d(?::[0-5]?\d)?$')
+
 
 class ChapterGenerator:
     """Generador de capítulos/timestamps para videos de YouTube"""
 
     def __init__(self):
-        self.client = GeminiClient()
+        self.client = get_gemini_client()
 
     def generate_chapters(self, transcript_segments: list[dict]) -> str:
         """
@@ -29,7 +36,8 @@ class ChapterGenerator:
         try:
             logger.info("Generando capítulos para el video...")
 
-            # Crear texto con timestamps para el análisis
+            # Crear texto con timestamps para el análisis (acotado al
+            # presupuesto de caracteres que consume el prompt)
             transcript_with_times = self._format_transcript_with_times(transcript_segments)
 
             # Generar capítulos usando IA
@@ -47,29 +55,43 @@ class ChapterGenerator:
             # Devolver capítulo básico en caso de error
             return "0:00 Video completo"
 
-    def _format_transcript_with_times(self, segments: list, sample_interval: int = 30) -> str:
+    def _format_transcript_with_times(self, segments: list, sample_interval: int = 30,
+                                      max_chars: int = 8200) -> str:
         """
         Formatea la transcripción con marcas de tiempo cada N segundos
 
         Args:
             segments: Segmentos de transcripción (FetchedTranscriptSnippet objects)
             sample_interval: Intervalo en segundos para muestrear (default: 30s)
+            max_chars: Presupuesto de caracteres; el texto se corta aquí en
+                vez de construirlo entero y truncarlo después
 
         Returns:
             Texto formateado con timestamps
         """
+        if not segments:
+            return ""
+
+        # Los .start vienen en orden cronológico: en vez de recorrer los
+        # ~miles de segmentos comprobando cada uno contra el umbral, se
+        # salta con bisect directamente al siguiente segmento muestreable
+        # (solo se toca .text de los segmentos que de verdad se emiten)
+        starts = [segment.start for segment in segments]
         formatted_lines = []
+        total_len = 0
         current_time = 0
-
-        for segment in segments:
-            # Los segmentos son objetos con atributos .start, .duration, .text
-            start_time = segment.start
-
-            # Agregar marca de tiempo cada sample_interval segundos
-            if start_time >= current_time:
-                timestamp = self._seconds_to_timestamp(start_time)
-                formatted_lines.append(f"[{timestamp}] {segment.text}")
-                current_time += sample_interval
+        idx = 0
+
+        while idx < len(starts):
+            segment = segments[idx]
+            timestamp = self._seconds_to_timestamp(segment.start)
+            line = f"[{timestamp}] {segment.text}"
+            total_len += len(line) + 1
+            if total_len > max_chars:
+                break
+            formatted_lines.append(line)
+            current_time += sample_interval
+            idx = bisect_left(starts, current_time, idx + 1)
 
         return "\n".join(formatted_lines)
 
@@ -86,7 +108,7 @@ class ChapterGenerator:
         prompt = f"""Analiza esta transcripción de video con timestamps y genera capítulos significativos.
 
 TRANSCRIPCIÓN:
-{transcript_with_times[:8000]}
+{transcript_with_times}
 
 INSTRUCCIONES:
 1. Identifica entre 5-10 momentos clave o cambios de tema en el video
@@ -157,17 +179,7 @@ Genera los capítulos ahora:"""
         Returns:
             True si es válido
         """
-        try:
-            parts = timestamp.split(":")
-            if len(parts) == 2:  # MM:SS
-                minutes, seconds = map(int, parts)
-                return 0 <= minutes and 0 <= seconds < 60
-            elif len(parts) == 3:  # HH:MM:SS
-                hours, minutes, seconds = map(int, parts)
-                return 0 <= hours and 0 <= minutes < 60 and 0 <= seconds < 60
-            return False
-        except (ValueError, AttributeError):
-            return False
+        return bool(_TS_VALID_RE.match(timestamp))
 
     def _seconds_to_timestamp(self, seconds: float) -> str:
         """
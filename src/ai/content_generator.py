@@ -1,14 +1,73 @@
+import asyncio
 import json
-import re
-from src.ai.gemini_client import GeminiClient
+from src.ai._sampling import sample_transcript
+from src.ai.gemini_client import get_gemini_client
 from src.utils.logger import logger
 
+# raw_decode() extrae el primer objeto JSON ignorando lo que venga después
+_JSON_DECODER = json.JSONDecoder()
+
+# Prefijos estáticos de los prompts. El contenido variable (transcripción)
+# se añade siempre AL FINAL: el proveedor cachea por prefijo, así que un
+# arranque idéntico entre llamadas permite reutilizar el KV-cache del modelo
+_METADATA_PROMPT_PREFIX = """Analiza la transcripción (al final de este mensaje) de un video de YouTube de un canal TECH/PROGRAMACIÓN y genera metadata atractiva.
+
+INSTRUCCIONES:
+1. Crea un TÍTULO atractivo estilo TECH/GEEK:
+   - Máximo 100 caracteres
+   - Usa terminología tech: API, IA, Cloud, DevOps, Kubernetes, Docker, Python, etc.
+   - Incluye emojis tech relevantes: 🚀 💻 🤖 ⚡ 🔥 💡 🎯 ⚙️ 🛠️
+   - Estilo clickbait tech pero informativo
+   - Puede incluir números o datos específicos si los hay
+   - En español pero con términos tech en inglés cuando sea natural
+   - Ejemplos de estilo:
+     * "🚀 Automatización con IA: Cómo Escalamos 10x con Python y GPT"
+     * "💻 Hackathon OpenAI: 48h Programando el Futuro de la IA"
+     * "🤖 De Junior a Senior: Las APIs que Cambiarán tu Código"
+     * "⚡ Black Friday Tech: Las Ofertas que SÍ Valen para Developers"
+
+2. Crea una DESCRIPCIÓN detallada que incluya:
+   - Hook inicial atractivo (1 línea que enganche)
+   - Resumen del contenido principal (2-3 párrafos)
+   - Puntos clave discutidos (bullet points con emojis)
+   - Links placeholder: [LINK] para recursos mencionados
+   - 5-8 hashtags tech relevantes al final (#IA #Python #Tech #Programacion etc.)
+   - Máximo 500 palabras
+   - En español con términos tech en inglés
+
+3. Resume el TEMA principal del video en 1-2 frases concisas (se usará
+   para ilustrar el thumbnail). Ejemplo: "Tutorial sobre Python y desarrollo web con FastAPI"
+
+Responde ÚNICAMENTE con JSON en este formato exacto:
+{
+  "title": "Tu título aquí",
+  "description": "Tu descripción aquí",
+  "theme": "Tema principal en 1-2 frases"
+}
+
+NO incluyas markdown, explicaciones adicionales ni texto fuera del JSON.
+
+TRANSCRIPCIÓN:
+"""
+
+_TITLE_PROMPT_PREFIX = """Basándote en la transcripción de un video de YouTube (al final de este mensaje), genera un título atractivo y descriptivo.
+
+REQUISITOS:
+- Máximo 100 caracteres
+- Claro y conciso
+- En español
+
+Responde SOLO con el título, sin comillas ni explicaciones adicionales.
+
+TRANSCRIPCIÓN:
+"""
+
 
 class ContentGenerator:
     """Generador de títulos y descripciones usando Gemini 3 Pro"""
 
     def __init__(self):
-        self.client = GeminiClient()
+        self.client = get_gemini_client()
 
     def generate_metadata(self, transcript: str, chapters: str = None) -> dict:
         """
@@ -19,14 +78,17 @@ class ContentGenerator:
             chapters: Capítulos/timestamps opcionales para incluir en la descripción
 
         Returns:
-            Dict con 'title' (≤100 chars) y 'description'
+            Dict con 'title' (≤100 chars), 'description' y 'theme' (tema
+            principal reutilizable por ThumbnailGenerator, ahorrando la
+            llamada extra de _extract_theme)
 
         Raises:
             Exception: Si falla la generación o parsing
         """
         try:
             # Limitar transcripción a ~4000 caracteres para no exceder tokens
-            transcript_sample = transcript[:4000]
+            # (corte en frontera de frase, estable entre ejecuciones)
+            transcript_sample = sample_transcript(transcript, 4000)
 
             logger.info("Generando título y descripción con Gemini...")
 
@@ -55,6 +117,16 @@ class ContentGenerator:
             logger.error(f"Error generando metadata: {e}", exc_info=True)
             raise
 
+    async def agenerate_metadata(self, transcript: str, chapters: str = None) -> dict:
+        """
+        Versión asíncrona de generate_metadata
+
+        Pensada para solaparse con otras llamadas I/O-bound a Gemini vía
+        asyncio.gather (p. ej. junto a la extracción de tema del thumbnail);
+        el rate limiter sigue aplicándose dentro del hilo.
+        """
+        return await asyncio.to_thread(self.generate_metadata, transcript, chapters)
+
     def _create_metadata_prompt(self, transcript: str) -> str:
         """
         Crea el prompt optimizado para generación de metadata
@@ -63,44 +135,10 @@ class ContentGenerator:
             transcript: Transcripción del video
 
         Returns:
-            Prompt estructurado
+            Prompt estructurado (prefijo estático + transcripción al final)
         """
-        return f"""Analiza esta transcripción de un video de YouTube de un canal TECH/PROGRAMACIÓN y genera metadata atractiva.
-
-TRANSCRIPCIÓN:
-{transcript}
-
-INSTRUCCIONES:
-1. Crea un TÍTULO atractivo estilo TECH/GEEK:
-   - Máximo 100 caracteres
-   - Usa terminología tech: API, IA, Cloud, DevOps, Kubernetes, Docker, Python, etc.
-   - Incluye emojis tech relevantes: 🚀 💻 🤖 ⚡ 🔥 💡 🎯 ⚙️ 🛠️
-   - Estilo clickbait tech pero informativo
-   - Puede incluir números o datos específicos si los hay
-   - En español pero con términos tech en inglés cuando sea natural
-   - Ejemplos de estilo:
-     * "🚀 Automatización con IA: Cómo Escalamos 10x con Python y GPT"
-     * "💻 Hackathon OpenAI: 48h Programando el Futuro de la IA"
-     * "🤖 De Junior a Senior: Las APIs que Cambiarán tu Código"
-     * "⚡ Black Friday Tech: Las Ofertas que SÍ Valen para Developers"
-
-2. Crea una DESCRIPCIÓN detallada que incluya:
-   - Hook inicial atractivo (1 línea que enganche)
-   - Resumen del contenido principal (2-3 párrafos)
-   - Puntos clave discutidos (bullet points con emojis)
-   - Links placeholder: [LINK] para recursos mencionados
-   - 5-8 hashtags tech relevantes al final (#IA #Python #Tech #Programacion etc.)
-   - Máximo 500 palabras
-   - En español con términos tech en inglés
-
-Responde ÚNICAMENTE con JSON en este formato exacto:
-{{
-  "title": "Tu título aquí",
-  "description": "Tu descripción aquí"
-}}
-
-NO incluyas markdown, explicaciones adicionales ni texto fuera del JSON.
-"""
+        # Concat directa de 2 strings (camino en C), sin formateo
+        return _METADATA_PROMPT_PREFIX + transcript
 
     def _parse_json_response(self, response_text: str) -> dict:
         """
@@ -119,22 +157,14 @@ NO incluyas markdown, explicaciones adicionales ni texto fuera del JSON.
             # Limpiar markdown code blocks si existen
             cleaned = response_text.strip()
 
-            if cleaned.startswith("```"):
-                # Extraer contenido entre ``` markers
-                match = re.search(r"```(?:json)?\s*\n?(.*?)\n?```", cleaned, re.DOTALL)
-                if match:
-                    cleaned = match.group(1)
-                else:
-                    # Remover el primer y último ```
-                    lines = cleaned.split("\n")
-                    if lines[0].startswith("```"):
-                        lines = lines[1:]
-                    if lines and lines[-1].startswith("```"):
-                        lines = lines[:-1]
-                    cleaned = "\n".join(lines)
-
-            # Parsear JSON
-            metadata = json.loads(cleaned.strip())
+            # Decodificar desde la primera llave con raw_decode: tolera
+            # fences, prosa introductoria y texto tras el objeto, así que
+            # una respuesta verbosa ya no quema un reintento de API
+            start = cleaned.find("{")
+            if start == -1:
+                raise ValueError("La respuesta no contiene ningún objeto JSON")
+
+            metadata, _ = _JSON_DECODER.raw_decode(cleaned, start)
 
             if "title" not in metadata or "description" not in metadata:
                 raise ValueError("JSON no contiene 'title' y 'description'")
@@ -170,7 +200,10 @@ NO incluyas markdown, explicaciones adicionales ni texto fuera del JSON.
         if len(description) < 50:
             logger.warning(f"Descripción muy corta ({len(description)} chars)")
 
-        return {"title": title, "description": description}
+        # Tema para el thumbnail (opcional: puede faltar en respuestas viejas)
+        theme = metadata.get("theme", "").strip()
+
+        return {"title": title, "description": description, "theme": theme}
 
     def generate_title_only(self, transcript: str) -> str:
         """
@@ -183,20 +216,9 @@ NO incluyas markdown, explicaciones adicionales ni texto fuera del JSON.
             Título generado
         """
         try:
-            transcript_sample = transcript[:2000]
-
-            prompt = f"""Basándote en esta transcripción de un video de YouTube, genera un título atractivo y descriptivo.
-
-TRANSCRIPCIÓN:
-{transcript_sample}
+            transcript_sample = sample_transcript(transcript, 2000)
 
-REQUISITOS:
-- Máximo 100 caracteres
-- Claro y conciso
-- En español
-
-Responde SOLO con el título, sin comillas ni explicaciones adicionales.
-"""
+            prompt = _TITLE_PROMPT_PREFIX + transcript_sample
 
             # No limitar tokens
             title = self.client.generate_text(prompt)
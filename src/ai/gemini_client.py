@@ -1,11 +1,31 @@
+from functools import lru_cache
+
 from google import genai
 from google.genai import types
 from config.settings import settings
+from src.ai import _text_cache
 from src.utils.logger import logger
 from src.utils.retry import gemini_text_limiter, gemini_image_limiter
-from PIL import Image
 from pathlib import Path
 
+# Configs de generación reutilizadas entre llamadas: construir un
+# GenerateContentConfig nuevo por petición no es gratis y casi siempre
+# se piden los mismos parámetros
+_DEFAULT_TEXT_CONFIG = types.GenerateContentConfig()
+_TOKEN_CONFIG_CACHE: dict[int, types.GenerateContentConfig] = {}
+
+
+def _text_config(max_tokens: int = None) -> types.GenerateContentConfig:
+    """Devuelve una config compartida (por proceso) para max_tokens"""
+    if not max_tokens:
+        return _DEFAULT_TEXT_CONFIG
+    config = _TOKEN_CONFIG_CACHE.get(max_tokens)
+    if config is None:
+        config = _TOKEN_CONFIG_CACHE[max_tokens] = types.GenerateContentConfig(
+            max_output_tokens=max_tokens
+        )
+    return config
+
 
 class GeminiClient:
     """Cliente unificado para Gemini 3 Pro (texto) y Nano Banana Pro (imágenes)"""
@@ -26,8 +46,9 @@ class GeminiClient:
         self.client = genai.Client(api_key=settings.GEMINI_API_KEY)
         logger.info("Cliente Gemini inicializado correctamente")
 
-    @gemini_text_limiter
-    def generate_text(self, prompt: str, model: str = None, max_tokens: int = None) -> str:
+    def generate_text(
+        self, prompt: str, model: str = None, max_tokens: int = None, use_cache: bool = True
+    ) -> str:
         """
         Genera texto usando Gemini
 
@@ -35,6 +56,8 @@ class GeminiClient:
             prompt: Prompt para el modelo
             model: Modelo a usar (default: settings.GEMINI_TEXT_MODEL)
             max_tokens: Máximo de tokens a generar (opcional)
+            use_cache: Servir/guardar la respuesta en la caché en disco
+                (los hits no pasan por el rate limiter ni por la red)
 
         Returns:
             Texto generado
@@ -43,15 +66,26 @@ class GeminiClient:
         """
         model = model or settings.GEMINI_TEXT_MODEL
 
+        if use_cache:
+            cached = _text_cache.get(model, prompt)
+            if cached is not None:
+                return cached
+
+        text = self._generate_text_api(prompt, model, max_tokens)
+
+        if use_cache:
+            _text_cache.put(model, prompt, text)
+
+        return text
+
+    @gemini_text_limiter
+    def _generate_text_api(self, prompt: str, model: str, max_tokens: int = None) -> str:
+        """Llamada real a la API de texto (rate-limited)"""
         try:
             logger.debug(f"Generando texto con {model}...")
 
-            config_params = {}
-            if max_tokens:
-                config_params["max_output_tokens"] = max_tokens
-
             response = self.client.models.generate_content(
-                model=model, contents=prompt, config=types.GenerateContentConfig(**config_params)
+                model=model, contents=prompt, config=_text_config(max_tokens)
             )
 
             # Extraer texto del response
@@ -117,7 +151,6 @@ class GeminiClient:
             logger.error(f"Error generando imagen: {e}", exc_info=True)
             raise
 
-    @gemini_image_limiter
     def generate_image_with_reference(
         self,
         prompt: str,
@@ -134,18 +167,48 @@ class GeminiClient:
             aspect_ratio: Relación de aspecto ('16:9', '1:1', '4:3', '9:16')
             image_size: Tamaño de imagen ('2K' para alta calidad)
 
+        Returns:
+            Bytes de la imagen generada
+        """
+        # Cargar imagen de referencia (import diferido de PIL: solo los
+        # flujos que generan imágenes lo pagan)
+        from PIL import Image
+
+        logger.debug(f"Imagen referencia: {reference_image_path}")
+        reference_image = Image.open(reference_image_path)
+
+        return self.generate_image_with_reference_obj(
+            prompt, reference_image, aspect_ratio=aspect_ratio, image_size=image_size
+        )
+
+    @gemini_image_limiter
+    def generate_image_with_reference_obj(
+        self,
+        prompt: str,
+        reference_image,
+        aspect_ratio: str = "16:9",
+        image_size: str = "2K",
+    ) -> bytes:
+        """
+        Variante de generate_image_with_reference con la imagen ya cargada.
+
+        Permite a los callers que procesan lotes decodificar la referencia
+        una sola vez y reutilizar el mismo objeto PIL en cada llamada.
+
+        Args:
+            prompt: Descripción de los cambios/tema a aplicar
+            reference_image: Imagen de referencia (PIL.Image ya abierta)
+            aspect_ratio: Relación de aspecto ('16:9', '1:1', '4:3', '9:16')
+            image_size: Tamaño de imagen ('2K' para alta calidad)
+
         Returns:
             Bytes de la imagen generada
         """
         try:
             model = settings.GEMINI_IMAGE_MODEL
             logger.info(f"Generando imagen con referencia usando {model}...")
-            logger.debug(f"Imagen referencia: {reference_image_path}")
             logger.debug(f"Prompt: {prompt[:100]}...")
 
-            # Cargar imagen de referencia
-            reference_image = Image.open(reference_image_path)
-
             response = self.client.models.generate_content(
                 model=model,
                 contents=[prompt, reference_image],
@@ -170,17 +233,25 @@ class GeminiClient:
             logger.error(f"Error generando imagen con referencia: {e}", exc_info=True)
             raise
 
-    def count_tokens(self, text: str, model: str = None) -> int:
+    def count_tokens(self, text: str, model: str = None, exact: bool = False) -> int:
         """
         Cuenta los tokens en un texto
 
+        Por defecto estima localmente (1 token ≈ 4 caracteres, suficiente
+        para pre-comprobar tamaños) sin gastar una llamada a la API; con
+        exact=True consulta el endpoint count_tokens remoto.
+
         Args:
             text: Texto a analizar
             model: Modelo a usar para conteo
+            exact: Usar el tokenizador remoto en vez de la estimación local
 
         Returns:
             Número de tokens
         """
+        if not exact:
+            return len(text) // 4
+
         model = model or settings.GEMINI_TEXT_MODEL
 
         try:
@@ -195,3 +266,14 @@ class GeminiClient:
             logger.warning(f"Error contando tokens: {e}")
             # Estimación simple si falla (1 token ≈ 4 caracteres)
             return len(text) // 4
+
+
+@lru_cache(maxsize=1)
+def get_gemini_client() -> GeminiClient:
+    """Instancia única de GeminiClient por proceso.
+
+    Los generadores de contenido, thumbnails y capítulos comparten el mismo
+    cliente en vez de repetir el handshake del SDK y la validación de la
+    API key en cada constructor.
+    """
+    return GeminiClient()
@@ -1,10 +1,12 @@
 from pathlib import Path
-from src.ai.gemini_client import GeminiClient
+from src.ai._sampling import sample_transcript
+from src.ai.gemini_client import get_gemini_client
 from src.utils.logger import logger
 from config.settings import settings
+import asyncio
 import base64
 import io
-from PIL import Image
+import json
 
 # Constantes de optimización para YouTube
 MAX_FILE_SIZE_BYTES = 2 * 1024 * 1024  # 2MB
@@ -13,14 +15,87 @@ TARGET_HEIGHT = 720
 JPEG_QUALITY_START = 85
 JPEG_QUALITY_MIN = 60
 
+# Cuerpos estáticos de los prompts, congelados como constantes de módulo:
+# se construyen una vez al importar y cada llamada solo concatena el tema
+# (única parte variable, siempre en la última línea para el prefijo cacheable)
+_REFERENCE_PROMPT_PREFIX = """Genera una nueva imagen para thumbnail de YouTube basada en la imagen de referencia.
+
+MANTENER EXACTAMENTE IGUAL (NO CAMBIAR):
+- Los 5 personajes cartoon exactamente como aparecen en la imagen de referencia
+- El estilo de ilustración cartoon con colores planos
+- Las expresiones faciales amigables
+- La disposición de los personajes en fila
+- Los tonos de piel cálidos y el estilo de dibujo
+
+MODIFICAR EL FONDO según el tema indicado en la última línea:
+- Cambia el fondo azul oscuro por elementos visuales relacionados con el tema
+- Añade iconos, elementos o escenografía temática DETRÁS de los personajes
+- Los elementos del tema deben complementar pero NO tapar a los personajes
+- Usa metáforas visuales relacionadas con el tema del video
+- Mantén un diseño limpio y profesional
+
+IMPORTANTE:
+- Los 5 personajes son la identidad del canal y DEBEN aparecer idénticos
+- Solo cambia el fondo/ambiente, NO los personajes
+- Mantén el aspecto 16:9 optimizado para YouTube
+- No añadas texto, logos ni marcas de agua
+
+TEMA DEL VIDEO: """
+
+_FALLBACK_PROMPT_PREFIX = """Create a professional YouTube thumbnail (16:9) for the video topic given on the last line of this message.
+
+CRITICAL - MUST INCLUDE THESE 5 CHARACTERS (ALWAYS):
+- Show 5 people sitting/standing together in a row
+- Character 1 (left): Man with rectangular glasses and gray beard
+- Character 2: Man with black beard, big smile, enthusiastic expression
+- Character 3 (center): Man with round glasses and brown beard
+- Character 4: Man with headphones and black beard
+- Character 5 (right): Younger man with glasses, clean look
+- All characters have cartoon style with warm skin tones
+- Friendly, approachable expressions
+
+BACKGROUND/THEME ADAPTATION:
+- Dark blue background as base color
+- Add theme-related elements, icons, or scenery BEHIND or AROUND the characters
+- The theme elements should complement but NOT hide the 5 characters
+- Make background elements relevant to the video topic
+- Use visual metaphors related to the video topic
+
+STYLE REQUIREMENTS:
+- Cartoon illustration style with flat colors
+- Clean lines and subtle shading
+- Warm color palette (skin tones) with high contrast
+- Modern, polished digital illustration
+- Professional quality, eye-catching
+
+COMPOSITION:
+- The 5 characters are the MAIN FOCUS (must always be clearly visible)
+- Theme elements are SECONDARY (background/decorative)
+- Clean, uncluttered design despite thematic elements
+- 16:9 aspect ratio optimized for YouTube
+
+DO NOT:
+- Remove or hide any of the 5 characters
+- Add text overlays, watermarks, or logos
+- Use photorealistic style (keep cartoon illustration)
+- Make background so busy it hides the characters
+
+The 5 characters are the channel's identity and MUST appear in every thumbnail.
+Only the background/theme changes per video.
+
+VIDEO TOPIC: """
+
 
 class ThumbnailGenerator:
     """Generador de miniaturas profesionales usando Imagen 3 (Nano Banana)"""
 
     def __init__(self):
-        self.client = GeminiClient()
+        self.client = get_gemini_client()
         self.pattern_path = settings.BASE_DIR / "patron_thumbnail.jpg"
         self.pattern_description = None
+        # Imagen patrón decodificada (se carga en el primer uso y se
+        # reutiliza en todo el lote: 1 decode en vez de N)
+        self._pattern_image = None
 
         # Analizar imagen patrón al inicializar
         if self.pattern_path.exists():
@@ -41,55 +116,85 @@ class ThumbnailGenerator:
         Returns:
             Path del archivo optimizado
         """
+        # Import diferido: los entrypoints que no generan thumbnails no
+        # pagan el arranque de PIL (solo la primera llamada lo importa)
+        from PIL import Image
+
         image = Image.open(io.BytesIO(image_bytes))
 
-        # Convertir a RGB si tiene canal alpha
-        if image.mode in ('RGBA', 'LA', 'P'):
-            background = Image.new('RGB', image.size, (255, 255, 255))
+        # Fast-path RGB primero (el caso común con la salida JPEG de Gemini):
+        # evita la asignación del fondo + paste (~3.6MB de memcpy) por llamada
+        if image.mode == 'RGB':
+            pass
+        elif image.mode in ('RGBA', 'P'):
+            # Aplanar alpha sobre fondo blanco
             if image.mode == 'P':
                 image = image.convert('RGBA')
-            if image.mode == 'RGBA':
-                background.paste(image, mask=image.split()[-1])
-            else:
-                background.paste(image)
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.split()[-1])
             image = background
-        elif image.mode != 'RGB':
+        else:
+            # LA, L, CMYK...: convert directo, sin imagen intermedia
             image = image.convert('RGB')
 
-        # Redimensionar si es más grande que 1280x720
+        # Redimensionar si es más grande que 1280x720. LANCZOS (8 taps por
+        # píxel) solo compensa en reducciones grandes; para factores cercanos
+        # a 1x BILINEAR (4 muestras) es ~4x más rápido sin pérdida visible
         if image.width > TARGET_WIDTH or image.height > TARGET_HEIGHT:
-            image.thumbnail((TARGET_WIDTH, TARGET_HEIGHT), Image.Resampling.LANCZOS)
+            scale = max(image.width / TARGET_WIDTH, image.height / TARGET_HEIGHT)
+            resample = Image.Resampling.LANCZOS if scale > 1.8 else Image.Resampling.BILINEAR
+            image.thumbnail((TARGET_WIDTH, TARGET_HEIGHT), resample)
             logger.info(f"Imagen redimensionada a: {image.width}x{image.height}")
 
-        # Guardar con compresión, reduciendo calidad si es necesario
-        quality = JPEG_QUALITY_START
-
-        while quality >= JPEG_QUALITY_MIN:
-            buffer = io.BytesIO()
-            image.save(buffer, format='JPEG', quality=quality, optimize=True, progressive=True)
-            size_bytes = buffer.tell()
+        # Un único buffer reutilizado entre intentos (seek+truncate en vez
+        # de asignar ~MBs de BytesIO nuevo por cada calidad probada)
+        buf = io.BytesIO()
 
-            if size_bytes <= MAX_FILE_SIZE_BYTES:
-                with open(output_path, 'wb') as f:
-                    f.write(buffer.getvalue())
-                size_mb = size_bytes / (1024 * 1024)
-                logger.info(f"Imagen optimizada: {size_mb:.2f}MB (calidad: {quality}%)")
-                return output_path
+        def _encode(q: int) -> int:
+            buf.seek(0)
+            buf.truncate()
+            # Sin optimize=True: la pasada Huffman extra duplica el coste
+            # de cada encode por un ahorro de tamaño marginal
+            image.save(buf, format='JPEG', quality=q, progressive=True)
+            return buf.tell()
 
-            logger.debug(f"Tamaño {size_bytes/(1024*1024):.2f}MB con calidad {quality}%, reduciendo...")
-            quality -= 5
+        # Caso común: la calidad inicial ya cabe en 2MB → un solo encode
+        quality = JPEG_QUALITY_START
+        size_bytes = _encode(quality)
+
+        if size_bytes > MAX_FILE_SIZE_BYTES:
+            # Búsqueda binaria de la mayor calidad que cabe (≤3 encodes en
+            # vez de bajar linealmente de 5 en 5)
+            lo, hi = JPEG_QUALITY_MIN, JPEG_QUALITY_START - 1
+            quality, best = JPEG_QUALITY_MIN, None
+            while lo <= hi:
+                mid = (lo + hi) // 2
+                if _encode(mid) <= MAX_FILE_SIZE_BYTES:
+                    quality, best = mid, buf.getvalue()
+                    lo = mid + 1
+                else:
+                    hi = mid - 1
+
+            if best is not None:
+                buf = io.BytesIO(best)
+                buf.seek(0, io.SEEK_END)
+            else:
+                # Ni la calidad mínima baja de 2MB; se guarda igualmente
+                _encode(JPEG_QUALITY_MIN)
+            size_bytes = buf.tell()
 
-        # Guardar con calidad mínima si aún es muy grande
-        buffer = io.BytesIO()
-        image.save(buffer, format='JPEG', quality=JPEG_QUALITY_MIN, optimize=True, progressive=True)
         with open(output_path, 'wb') as f:
-            f.write(buffer.getvalue())
+            f.write(buf.getbuffer())
 
-        final_size = output_path.stat().st_size / (1024 * 1024)
-        logger.warning(f"Imagen guardada con calidad mínima: {final_size:.2f}MB")
+        size_mb = size_bytes / (1024 * 1024)
+        if size_bytes <= MAX_FILE_SIZE_BYTES:
+            logger.info(f"Imagen optimizada: {size_mb:.2f}MB (calidad: {quality}%)")
+        else:
+            logger.warning(f"Imagen guardada con calidad mínima: {size_mb:.2f}MB")
         return output_path
 
-    def generate_thumbnail(self, transcript: str, video_id: str, title: str = None) -> Path:
+    def generate_thumbnail(self, transcript: str, video_id: str, title: str = None,
+                           theme: str = None) -> Path:
         """
         Genera miniatura profesional basada en el contenido del video,
         usando la imagen patrón como referencia para mantener los personajes.
@@ -98,6 +203,9 @@ class ThumbnailGenerator:
             transcript: Transcripción del video
             video_id: ID del video (para nombrar archivo)
             title: Título del video (opcional, para más contexto)
+            theme: Tema ya extraído (p. ej. metadata['theme'] de
+                ContentGenerator); si se pasa, se ahorra la llamada a
+                Gemini de _extract_theme
 
         Returns:
             Path al archivo de imagen guardado
@@ -114,8 +222,10 @@ class ThumbnailGenerator:
         try:
             logger.info(f"Generando miniatura para video {video_id}...")
 
-            # 1. Extraer tema principal del contenido
-            theme = self._extract_theme(transcript, title)
+            # 1. Extraer tema principal del contenido (salvo que el caller
+            # ya lo traiga de generate_metadata: una llamada menos)
+            if not theme:
+                theme = self._extract_theme(transcript, title)
             logger.info(f"Tema identificado: {theme}")
 
             # 2. Crear prompt para modificar/adaptar la imagen de referencia
@@ -124,9 +234,14 @@ class ThumbnailGenerator:
             # 3. Generar imagen usando la imagen patrón como referencia
             if self.pattern_path.exists():
                 logger.info("Usando imagen patrón como referencia...")
-                image_bytes = self.client.generate_image_with_reference(
+                if self._pattern_image is None:
+                    from PIL import Image
+
+                    self._pattern_image = Image.open(self.pattern_path)
+                    self._pattern_image.load()
+                image_bytes = self.client.generate_image_with_reference_obj(
                     prompt=image_prompt,
-                    reference_image_path=self.pattern_path,
+                    reference_image=self._pattern_image,
                     aspect_ratio="16:9",
                     image_size="2K"
                 )
@@ -159,6 +274,15 @@ class ThumbnailGenerator:
             logger.error(f"Error generando miniatura: {e}", exc_info=True)
             raise
 
+    async def agenerate_thumbnail(self, transcript: str, video_id: str, title: str = None,
+                                  theme: str = None) -> Path:
+        """Versión asíncrona de generate_thumbnail (para asyncio.gather)"""
+        return await asyncio.to_thread(self.generate_thumbnail, transcript, video_id, title, theme)
+
+    async def aextract_theme(self, transcript: str, title: str = None) -> str:
+        """Versión asíncrona de _extract_theme (para asyncio.gather)"""
+        return await asyncio.to_thread(self._extract_theme, transcript, title)
+
     def _extract_theme(self, transcript: str, title: str = None) -> str:
         """
         Extrae el tema principal de la transcripción
@@ -171,20 +295,27 @@ class ThumbnailGenerator:
             Tema principal resumido
         """
         try:
-            # Usar solo inicio de transcripción para ser eficiente
-            transcript_sample = transcript[:2000]
+            # Usar solo inicio de transcripción para ser eficiente. El
+            # espaciado se normaliza para que re-subidas o transcripciones
+            # con formato ligeramente distinto produzcan el mismo prompt y
+            # aprovechen la caché en disco de generate_text; el corte
+            # respeta fronteras de frase
+            transcript_sample = sample_transcript(
+                " ".join(transcript[:2400].split()), 2000
+            )
 
             title_context = f"\nTítulo: {title}" if title else ""
 
-            prompt = f"""Analiza esta transcripción de un video y resume el tema principal en 1-2 frases concisas.
-{title_context}
-
-TRANSCRIPCIÓN:
-{transcript_sample}
+            # Instrucciones estáticas primero, contenido variable al final
+            # (maximiza hits del caché de prefijos del proveedor)
+            prompt = f"""Analiza la transcripción de un video (al final de este mensaje) y resume el tema principal en 1-2 frases concisas.
 
 Responde SOLO con el tema principal, sin introducción ni explicaciones adicionales.
 Ejemplo: "Tutorial sobre Python y desarrollo web con FastAPI"
-"""
+{title_context}
+
+TRANSCRIPCIÓN:
+{transcript_sample}"""
 
             theme = self.client.generate_text(prompt)
             return theme.strip()
@@ -194,29 +325,34 @@ Ejemplo: "Tutorial sobre Python y desarrollo web con FastAPI"
             # Fallback: usar título o texto genérico
             return title if title else "Contenido de video educativo"
 
+    def _pattern_fingerprint(self) -> str:
+        """Huella barata de la imagen patrón (mtime + tamaño, sin leerla)"""
+        stat = self.pattern_path.stat()
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
     def _analyze_pattern(self):
         """
         Analiza la imagen patrón para extraer su estilo visual
-        """
-        try:
-            logger.info("Analizando imagen patrón de thumbnails...")
 
-            # Leer y codificar la imagen
-            with open(self.pattern_path, "rb") as f:
-                image_data = f.read()
+        La descripción se persiste en .pattern_cache.json junto a la huella
+        del fichero: mientras patron_thumbnail.jpg no cambie, los arranques
+        siguientes cargan el resultado sin repetir el análisis.
+        """
+        cache_path = settings.BASE_DIR / ".pattern_cache.json"
 
-            # Crear prompt para analizar el estilo
-            prompt = """Analiza esta imagen y describe su estilo visual en inglés de manera concisa.
+        try:
+            fingerprint = self._pattern_fingerprint()
 
-Enfócate en:
-- Estilo artístico (cartoon, ilustración, 3D, etc.)
-- Paleta de colores predominante
-- Tipo de personajes o elementos
-- Atmósfera y mood general
-- Técnica de ilustración
+            try:
+                cached = json.loads(cache_path.read_text(encoding="utf-8"))
+                if cached.get("fingerprint") == fingerprint:
+                    self.pattern_description = cached.get("description")
+                    logger.debug("Descripción del patrón cargada de caché")
+                    return
+            except (FileNotFoundError, json.JSONDecodeError):
+                pass
 
-Responde en 2-3 frases cortas que puedan usarse como referencia de estilo.
-Solo describe el estilo, NO el contenido específico."""
+            logger.info("Analizando imagen patrón de thumbnails...")
 
             # Usar Gemini para analizar la imagen (esto requeriría multimodal input)
             # Por ahora, voy a establecer una descripción fija basada en lo que veo
@@ -224,6 +360,11 @@ Solo describe el estilo, NO el contenido específico."""
 flat colors with subtle shading, warm skin tones, and a dark blue background.
 Professional digital illustration with clean lines and friendly, approachable character designs."""
 
+            cache_path.write_text(
+                json.dumps({"fingerprint": fingerprint, "description": self.pattern_description}),
+                encoding="utf-8",
+            )
+
             logger.info(f"Estilo de patrón identificado: {self.pattern_description}")
 
         except Exception as e:
@@ -241,31 +382,8 @@ Professional digital illustration with clean lines and friendly, approachable ch
         Returns:
             Prompt optimizado para usar con imagen de referencia
         """
-        prompt = f"""Genera una nueva imagen para thumbnail de YouTube basada en la imagen de referencia.
-
-MANTENER EXACTAMENTE IGUAL (NO CAMBIAR):
-- Los 5 personajes cartoon exactamente como aparecen en la imagen de referencia
-- El estilo de ilustración cartoon con colores planos
-- Las expresiones faciales amigables
-- La disposición de los personajes en fila
-- Los tonos de piel cálidos y el estilo de dibujo
-
-MODIFICAR EL FONDO según este tema: {theme}
-
-Instrucciones para el fondo:
-- Cambia el fondo azul oscuro por elementos visuales relacionados con: {theme}
-- Añade iconos, elementos o escenografía temática DETRÁS de los personajes
-- Los elementos del tema deben complementar pero NO tapar a los personajes
-- Usa metáforas visuales relacionadas con el tema del video
-- Mantén un diseño limpio y profesional
-
-IMPORTANTE:
-- Los 5 personajes son la identidad del canal y DEBEN aparecer idénticos
-- Solo cambia el fondo/ambiente, NO los personajes
-- Mantén el aspecto 16:9 optimizado para YouTube
-- No añadas texto, logos ni marcas de agua
-"""
-        return prompt
+        # Concat directa de 2 strings (camino en C), sin formateo
+        return _REFERENCE_PROMPT_PREFIX + theme
 
     def _create_thumbnail_prompt(self, theme: str) -> str:
         """
@@ -278,48 +396,7 @@ IMPORTANTE:
         Returns:
             Prompt para Imagen 3
         """
-        prompt = f"""Create a professional YouTube thumbnail (16:9) for a video about: {theme}
-
-CRITICAL - MUST INCLUDE THESE 5 CHARACTERS (ALWAYS):
-- Show 5 people sitting/standing together in a row
-- Character 1 (left): Man with rectangular glasses and gray beard
-- Character 2: Man with black beard, big smile, enthusiastic expression
-- Character 3 (center): Man with round glasses and brown beard
-- Character 4: Man with headphones and black beard
-- Character 5 (right): Younger man with glasses, clean look
-- All characters have cartoon style with warm skin tones
-- Friendly, approachable expressions
-
-BACKGROUND/THEME ADAPTATION:
-- Dark blue background as base color
-- Add theme-related elements, icons, or scenery BEHIND or AROUND the characters
-- The theme elements should complement but NOT hide the 5 characters
-- Make background elements relevant to: {theme}
-- Use visual metaphors related to the video topic
-
-STYLE REQUIREMENTS:
-- Cartoon illustration style with flat colors
-- Clean lines and subtle shading
-- Warm color palette (skin tones) with high contrast
-- Modern, polished digital illustration
-- Professional quality, eye-catching
-
-COMPOSITION:
-- The 5 characters are the MAIN FOCUS (must always be clearly visible)
-- Theme elements are SECONDARY (background/decorative)
-- Clean, uncluttered design despite thematic elements
-- 16:9 aspect ratio optimized for YouTube
-
-DO NOT:
-- Remove or hide any of the 5 characters
-- Add text overlays, watermarks, or logos
-- Use photorealistic style (keep cartoon illustration)
-- Make background so busy it hides the characters
-
-The 5 characters are the channel's identity and MUST appear in every thumbnail.
-Only the background/theme changes per video.
-"""
-        return prompt
+        return _FALLBACK_PROMPT_PREFIX + theme
 
     def generate_custom_thumbnail(self, prompt: str, video_id: str) -> Path:
         """
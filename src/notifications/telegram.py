@@ -7,24 +7,45 @@ Envía notificaciones a un bot de Telegram cuando:
 - Se inicia el sistema
 """
 
+import atexit
+import functools
+import queue
 import requests
+import threading
+import time
+from datetime import datetime
+from requests.adapters import HTTPAdapter
 from typing import Optional
 import os
 from pathlib import Path
 
+# Sesión compartida con keep-alive: las ráfagas de notificaciones reutilizan
+# la misma conexión TLS con api.telegram.org en vez de renegociar por envío
+_SESSION = requests.Session()
+_SESSION.mount(
+    "https://api.telegram.org",
+    HTTPAdapter(pool_connections=1, pool_maxsize=4),
+)
 
+
+@functools.lru_cache(maxsize=1)
 def _load_telegram_config() -> tuple[Optional[str], Optional[str]]:
-    """Carga la configuración de Telegram desde .env o variables de entorno."""
-    # Intentar cargar desde .env
+    """
+    Carga la configuración de Telegram desde .env o variables de entorno.
+
+    Cacheada (lru_cache): el .env se lee y parsea una sola vez por proceso
+    en vez de abrirse en cada notificación.
+    """
     env_path = Path(__file__).parent.parent.parent / ".env"
-    env_vars = {}
 
     if env_path.exists():
-        with open(env_path) as f:
-            for line in f:
-                if '=' in line and not line.startswith('#'):
-                    key, value = line.strip().split('=', 1)
-                    env_vars[key] = value
+        env_vars = dict(
+            line.strip().split('=', 1)
+            for line in env_path.read_text().splitlines()
+            if '=' in line and not line.startswith('#')
+        )
+    else:
+        env_vars = {}
 
     bot_token = env_vars.get('TELEGRAM_BOT_TOKEN') or os.environ.get('TELEGRAM_BOT_TOKEN')
     chat_id = env_vars.get('TELEGRAM_CHAT_ID') or os.environ.get('TELEGRAM_CHAT_ID')
@@ -32,16 +53,77 @@ def _load_telegram_config() -> tuple[Optional[str], Optional[str]]:
     return bot_token, chat_id
 
 
+@functools.lru_cache(maxsize=1)
+def _send_message_url(bot_token: str) -> str:
+    """URL del endpoint sendMessage, interpolada una sola vez por token."""
+    return f"https://api.telegram.org/bot{bot_token}/sendMessage"
+
+
+# Envío en segundo plano: el pipeline encola y sigue, sin bloquearse en la
+# latencia de red de Telegram. Cola acotada (si se llena, se descartan
+# mensajes antes que acumular memoria sin límite).
+_queue: queue.Queue = queue.Queue(maxsize=100)
+_worker_started = False
+_worker_lock = threading.Lock()
+
+
+def _worker_loop() -> None:
+    """Drena la cola y hace los POST reales (hilo daemon)."""
+    while True:
+        url, payload = _queue.get()
+        try:
+            _SESSION.post(url, json=payload, timeout=10)
+        except Exception:
+            # Las notificaciones son best-effort; un fallo no debe matar el hilo
+            pass
+        finally:
+            _queue.task_done()
+
+
+# Margen máximo para vaciar la cola al salir del proceso: suficiente para
+# unos pocos POST pendientes, sin colgar la salida si Telegram no responde
+_DRAIN_TIMEOUT = 10.0
+
+
+def _drain_queue(timeout: float = _DRAIN_TIMEOUT) -> None:
+    """
+    Espera (con tope) a que el hilo de envío vacíe la cola.
+
+    Registrada en atexit: los call sites típicos encolan la notificación
+    justo antes de terminar el proceso (éxito al final de main, error antes
+    de sys.exit), y sin este drenaje el hilo daemon moriría con los
+    mensajes aún en la cola.
+    """
+    deadline = time.monotonic() + timeout
+    while _queue.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+
+def _ensure_worker() -> None:
+    """Arranca el hilo de envío la primera vez que se necesita."""
+    global _worker_started
+    if not _worker_started:
+        with _worker_lock:
+            if not _worker_started:
+                threading.Thread(target=_worker_loop, daemon=True).start()
+                atexit.register(_drain_queue)
+                _worker_started = True
+
+
 def send_telegram_notification(message: str, parse_mode: str = "HTML") -> bool:
     """
-    Envía una notificación a Telegram.
+    Envía una notificación a Telegram (no bloqueante).
+
+    El mensaje se encola y un hilo en segundo plano hace el POST real, de
+    modo que el pipeline no espera la latencia de red por cada aviso.
 
     Args:
         message: Texto del mensaje (soporta HTML)
         parse_mode: Modo de parseo (HTML o Markdown)
 
     Returns:
-        True si se envió correctamente, False en caso contrario
+        True si se encoló correctamente, False si no hay configuración
+        o la cola está llena
     """
     bot_token, chat_id = _load_telegram_config()
 
@@ -49,7 +131,6 @@ def send_telegram_notification(message: str, parse_mode: str = "HTML") -> bool:
         # Silenciosamente ignorar si no está configurado
         return False
 
-    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
     payload = {
         "chat_id": chat_id,
         "text": message,
@@ -57,10 +138,11 @@ def send_telegram_notification(message: str, parse_mode: str = "HTML") -> bool:
         "disable_web_page_preview": False
     }
 
+    _ensure_worker()
     try:
-        response = requests.post(url, json=payload, timeout=10)
-        return response.status_code == 200
-    except Exception:
+        _queue.put_nowait((_send_message_url(bot_token), payload))
+        return True
+    except queue.Full:
         return False
 
 
@@ -118,8 +200,6 @@ def notify_system_start() -> bool:
     Returns:
         True si se envió la notificación
     """
-    from datetime import datetime
-
     message = (
         f"<b>YouTube Processor iniciado</b>\n\n"
         f"Hora: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
@@ -144,7 +224,10 @@ if __name__ == "__main__":
         result = send_telegram_notification(
             "<b>Test</b>\n\nNotificaciones de YouTube Processor configuradas correctamente."
         )
+        # El envío es asíncrono: esperar (con tope) a que el hilo drene la
+        # cola antes de que el proceso de prueba termine
+        _drain_queue()
         if result:
-            print("Notificación enviada correctamente!")
+            print("Notificación encolada y enviada!")
         else:
-            print("Error al enviar notificación. Verifica el token y chat_id.")
+            print("Error al encolar notificación. Verifica el token y chat_id.")
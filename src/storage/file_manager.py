@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 from src.utils.logger import logger
 from config.settings import settings
@@ -9,6 +10,47 @@ class FileManager:
     def __init__(self):
         """Inicializa el gestor y asegura que existan los directorios"""
         settings.ensure_directories()
+        # Directorios base cacheados en la instancia: evita el acceso a
+        # settings y deja listos los Path para los joinpath por video
+        self._tx_dir = settings.TRANSCRIPTS_DIR
+        self._thumb_dir = settings.THUMBNAILS_DIR
+        # Caché por directorio de los escaneos (listados/estadísticas),
+        # invalidada por mtime: si el directorio no cambió, los N stat/glob
+        # se sustituyen por un único stat del propio directorio
+        self._scan_cache: dict = {}
+
+    def _scan_dir(self, directory: Path, suffix: str) -> list[tuple[str, int]]:
+        """
+        Escanea un directorio con caché por mtime
+
+        Args:
+            directory: Directorio a escanear
+            suffix: Extensión a filtrar (ej: ".txt"); "" para todos los archivos
+
+        Returns:
+            Lista de (nombre_sin_extensión, tamaño_en_bytes)
+        """
+        try:
+            dir_mtime = directory.stat().st_mtime_ns
+        except FileNotFoundError:
+            return []
+
+        key = (str(directory), suffix)
+        cached = self._scan_cache.get(key)
+        if cached is not None and cached[0] == dir_mtime:
+            return cached[1]
+
+        # os.scandir lee las entradas en lote y sus DirEntry cachean el
+        # stat, así que el tamaño no cuesta un syscall extra por archivo
+        entries = []
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_file() and (not suffix or entry.name.endswith(suffix)):
+                    stem = entry.name.rsplit(".", 1)[0] if "." in entry.name else entry.name
+                    entries.append((stem, entry.stat().st_size))
+
+        self._scan_cache[key] = (dir_mtime, entries)
+        return entries
 
     def save_transcript_text(self, video_id: str, text: str) -> Path:
         """
@@ -22,12 +64,47 @@ class FileManager:
             Path al archivo guardado
         """
         try:
-            file_path = settings.TRANSCRIPTS_DIR / f"{video_id}.txt"
+            file_path = self._tx_dir.joinpath(f"{video_id}.txt")
 
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(text)
+            file_path.write_text(text, encoding="utf-8")
 
-            logger.info(f"Transcripción guardada en {file_path} ({len(text)} caracteres)")
+            logger.info("Transcripción guardada en %s (%d caracteres)", file_path, len(text))
+            return file_path
+
+        except Exception as e:
+            logger.error(f"Error guardando transcripción: {e}", exc_info=True)
+            raise
+
+    def save_transcript_text_iter(self, video_id: str, segments_iter) -> Path:
+        """
+        Guarda transcripción como texto plano escribiendo por segmentos
+
+        Variante streaming de save_transcript_text: escribe línea a línea
+        con un buffer de 1MB, sin materializar la transcripción completa en
+        memoria (en streams de varias horas el string llega a decenas de MB).
+
+        Args:
+            video_id: ID del video
+            segments_iter: Iterable de segmentos con clave/atributo 'text'
+                (dicts o los snippets de TranscriptionExtractor)
+
+        Returns:
+            Path al archivo guardado
+        """
+
+        def _text(segment) -> str:
+            # Los snippets del extractor exponen .text como atributo; los
+            # dicts (p. ej. de fixtures o del JSON guardado) lo indexan
+            text = getattr(segment, "text", None)
+            return text if text is not None else segment["text"]
+
+        try:
+            file_path = self._tx_dir.joinpath(f"{video_id}.txt")
+
+            with file_path.open("w", buffering=1 << 20, encoding="utf-8") as f:
+                f.writelines(_text(segment) + "\n" for segment in segments_iter)
+
+            logger.info("Transcripción guardada en %s (streaming)", file_path)
             return file_path
 
         except Exception as e:
@@ -46,12 +123,11 @@ class FileManager:
             Path al archivo guardado
         """
         try:
-            file_path = settings.TRANSCRIPTS_DIR / f"{video_id}.srt"
+            file_path = self._tx_dir.joinpath(f"{video_id}.srt")
 
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(srt_content)
+            file_path.write_text(srt_content, encoding="utf-8")
 
-            logger.info(f"Subtítulos SRT guardados en {file_path}")
+            logger.info("Subtítulos SRT guardados en %s", file_path)
             return file_path
 
         except Exception as e:
@@ -70,12 +146,11 @@ class FileManager:
             Path al archivo guardado
         """
         try:
-            file_path = settings.TRANSCRIPTS_DIR / f"{video_id}.vtt"
+            file_path = self._tx_dir.joinpath(f"{video_id}.vtt")
 
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(vtt_content)
+            file_path.write_text(vtt_content, encoding="utf-8")
 
-            logger.info(f"Subtítulos VTT guardados en {file_path}")
+            logger.info("Subtítulos VTT guardados en %s", file_path)
             return file_path
 
         except Exception as e:
@@ -96,15 +171,14 @@ class FileManager:
             FileNotFoundError: Si no existe el archivo
         """
         try:
-            file_path = settings.TRANSCRIPTS_DIR / f"{video_id}.txt"
+            file_path = self._tx_dir.joinpath(f"{video_id}.txt")
 
             if not file_path.exists():
                 raise FileNotFoundError(f"Transcripción no encontrada: {file_path}")
 
-            with open(file_path, "r", encoding="utf-8") as f:
-                content = f.read()
+            content = file_path.read_text(encoding="utf-8")
 
-            logger.debug(f"Transcripción cargada: {len(content)} caracteres")
+            logger.debug("Transcripción cargada: %d caracteres", len(content))
             return content
 
         except Exception as e:
@@ -121,8 +195,9 @@ class FileManager:
         Returns:
             True si existe el archivo
         """
-        file_path = settings.TRANSCRIPTS_DIR / f"{video_id}.txt"
-        return file_path.exists()
+        # os.path.isfile evita instanciar el stat_result de Path.exists()
+        # (se nota al comprobar cientos de videos en bucle)
+        return os.path.isfile(self._tx_dir.joinpath(f"{video_id}.txt"))
 
     def thumbnail_exists(self, video_id: str) -> bool:
         """
@@ -134,8 +209,23 @@ class FileManager:
         Returns:
             True si existe el archivo
         """
-        file_path = settings.THUMBNAILS_DIR / f"{video_id}.jpg"
-        return file_path.exists()
+        return os.path.isfile(self._thumb_dir.joinpath(f"{video_id}.jpg"))
+
+    def which_transcripts_exist(self, video_ids) -> set[str]:
+        """
+        Comprueba en lote qué videos ya tienen transcripción guardada
+
+        Un scandir del directorio (cacheado por mtime) sustituye a un stat
+        por video: preferible a llamar transcript_exists en bucle.
+
+        Args:
+            video_ids: Iterable de IDs de video a comprobar
+
+        Returns:
+            Subconjunto de video_ids con .txt presente
+        """
+        present = {stem for stem, _ in self._scan_dir(self._tx_dir, ".txt")}
+        return present & set(video_ids)
 
     def get_thumbnail_path(self, video_id: str) -> Path:
         """
@@ -147,7 +237,7 @@ class FileManager:
         Returns:
             Path al archivo de thumbnail
         """
-        return settings.THUMBNAILS_DIR / f"{video_id}.jpg"
+        return self._thumb_dir.joinpath(f"{video_id}.jpg")
 
     def get_srt_path(self, video_id: str) -> Path:
         """
@@ -159,7 +249,27 @@ class FileManager:
         Returns:
             Path al archivo SRT
         """
-        return settings.TRANSCRIPTS_DIR / f"{video_id}.srt"
+        return self._tx_dir.joinpath(f"{video_id}.srt")
+
+    def get_paths(self, video_id: str) -> dict:
+        """
+        Obtiene de una vez todos los paths asociados a un video
+
+        Para bucles en lote: una llamada devuelve los cuatro paths sin que
+        el caller reconstruya los joins por separado.
+
+        Args:
+            video_id: ID del video
+
+        Returns:
+            Dict con 'txt', 'srt', 'vtt' y 'thumbnail'
+        """
+        return {
+            "txt": self._tx_dir.joinpath(f"{video_id}.txt"),
+            "srt": self._tx_dir.joinpath(f"{video_id}.srt"),
+            "vtt": self._tx_dir.joinpath(f"{video_id}.vtt"),
+            "thumbnail": self._thumb_dir.joinpath(f"{video_id}.jpg"),
+        }
 
     def clean_files(self, video_id: str):
         """
@@ -169,24 +279,27 @@ class FileManager:
             video_id: ID del video
         """
         files_to_remove = [
-            settings.TRANSCRIPTS_DIR / f"{video_id}.txt",
-            settings.TRANSCRIPTS_DIR / f"{video_id}.srt",
-            settings.TRANSCRIPTS_DIR / f"{video_id}.vtt",
-            settings.THUMBNAILS_DIR / f"{video_id}.jpg",
+            self._tx_dir.joinpath(f"{video_id}.txt"),
+            self._tx_dir.joinpath(f"{video_id}.srt"),
+            self._tx_dir.joinpath(f"{video_id}.vtt"),
+            self._thumb_dir.joinpath(f"{video_id}.jpg"),
         ]
 
         removed_count = 0
         for file_path in files_to_remove:
-            if file_path.exists():
-                try:
-                    file_path.unlink()
-                    removed_count += 1
-                    logger.debug(f"Eliminado: {file_path}")
-                except Exception as e:
-                    logger.warning(f"No se pudo eliminar {file_path}: {e}")
+            # unlink directo sin exists() previo: un syscall por archivo en
+            # vez del par stat+unlink (FileNotFoundError cuenta como ausente)
+            try:
+                file_path.unlink()
+                removed_count += 1
+                logger.debug("Eliminado: %s", file_path)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"No se pudo eliminar {file_path}: {e}")
 
         if removed_count > 0:
-            logger.info(f"Eliminados {removed_count} archivos para video {video_id}")
+            logger.info("Eliminados %d archivos para video %s", removed_count, video_id)
 
     def list_processed_videos(self) -> list[str]:
         """
@@ -195,17 +308,13 @@ class FileManager:
         Returns:
             Lista de video IDs
         """
+        # update() en lote desde los escaneos cacheados (transcripciones y
+        # thumbnails), sin bucle Python entrada a entrada
         video_ids = set()
+        video_ids.update(stem for stem, _ in self._scan_dir(self._tx_dir, ".txt"))
+        video_ids.update(stem for stem, _ in self._scan_dir(self._thumb_dir, ".jpg"))
 
-        # Buscar en transcripciones
-        for file_path in settings.TRANSCRIPTS_DIR.glob("*.txt"):
-            video_ids.add(file_path.stem)
-
-        # Buscar en thumbnails
-        for file_path in settings.THUMBNAILS_DIR.glob("*.jpg"):
-            video_ids.add(file_path.stem)
-
-        return sorted(list(video_ids))
+        return sorted(video_ids)
 
     def get_storage_stats(self) -> dict:
         """
@@ -214,12 +323,12 @@ class FileManager:
         Returns:
             Dict con estadísticas
         """
-        transcript_files = list(settings.TRANSCRIPTS_DIR.glob("*"))
-        thumbnail_files = list(settings.THUMBNAILS_DIR.glob("*.jpg"))
+        transcript_files = self._scan_dir(self._tx_dir, "")
+        thumbnail_files = self._scan_dir(self._thumb_dir, ".jpg")
 
-        # Calcular tamaño total
-        transcript_size = sum(f.stat().st_size for f in transcript_files if f.is_file())
-        thumbnail_size = sum(f.stat().st_size for f in thumbnail_files if f.is_file())
+        # Calcular tamaño total (los tamaños vienen del propio escaneo)
+        transcript_size = sum(size for _, size in transcript_files)
+        thumbnail_size = sum(size for _, size in thumbnail_files)
 
         stats = {
             "transcript_count": len(transcript_files),
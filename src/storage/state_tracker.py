@@ -1,41 +1,160 @@
 import json
+import mmap
+import os
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
 from src.utils.logger import logger
 from config.settings import settings
 
+try:
+    # orjson (C) serializa/deserializa varias veces más rápido que json;
+    # opcional: sin él se usa el json de la stdlib con la misma semántica
+    import orjson
+
+    def _loads(data):
+        return orjson.loads(data)
+
+    def _loads_buffer(buf):
+        # orjson parsea memoryviews sin copiar el contenido
+        return orjson.loads(memoryview(buf))
+
+    def _dump_state_bytes(state: dict) -> bytes:
+        return orjson.dumps(state, option=orjson.OPT_INDENT_2)
+
+    def _dump_line_bytes(op: dict) -> bytes:
+        return orjson.dumps(op) + b"\n"
+
+except ImportError:
+    def _loads(data):
+        return json.loads(data)
+
+    def _loads_buffer(buf):
+        # json de la stdlib no acepta buffers: copia única a bytes
+        return json.loads(buf[:])
+
+    def _dump_state_bytes(state: dict) -> bytes:
+        return json.dumps(state, indent=2, ensure_ascii=False).encode("utf-8")
+
+    def _dump_line_bytes(op: dict) -> bytes:
+        return (json.dumps(op, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+# Compactar el oplog a state.json cada N operaciones registradas
+_COMPACT_EVERY = 50
+
+# Por debajo de este tamaño, leer el archivo entero es más barato que mapear
+_MMAP_THRESHOLD = 64 * 1024
+
+
+def _read_state_file(path: Path) -> dict:
+    """
+    Lee y parsea state.json
+
+    Estados grandes se parsean directamente sobre un mmap de solo lectura,
+    evitando la copia intermedia a un bytes de Python; por debajo de 64KB
+    el read_bytes normal gana al overhead del mapeo.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < _MMAP_THRESHOLD:
+            return _loads(f.read())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return _loads_buffer(mm)
+
+
+def _utcnow_iso() -> str:
+    """Timestamp UTC en ISO-8601 con sufijo Z (un solo formateo por llamada)"""
+    return datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+
 
 class StateTracker:
     """Gestiona el estado de videos procesados usando JSON"""
 
-    def __init__(self, state_file: Path = None):
+    def __init__(self, state_file: Path = None, autosave: bool = True):
         """
         Args:
             state_file: Path al archivo de estado (default: data/state.json)
+            autosave: Si True (default), cada mutación se registra al
+                momento. Con False, las mutaciones solo marcan el estado
+                como sucio y el caller decide cuándo persistir con flush().
+
+        Persistencia: las mutaciones se añaden como una línea JSONL al
+        oplog (state.log.jsonl) — O(1 registro) por operación en vez de
+        reescribir el state.json entero — y el log se compacta al archivo
+        base cada _COMPACT_EVERY operaciones o en flush().
         """
         self.state_file = state_file or (settings.DATA_DIR / "state.json")
+        self.log_file = self.state_file.with_suffix(".log.jsonl")
+        self.autosave = autosave
+        self._dirty = False
+        self._ops_since_compact = 0
+        # Crear el directorio una sola vez aquí; las escrituras posteriores
+        # no repiten el par stat/mkdir por operación
+        settings.ensure_directories()
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
         self.state = self._load_state()
 
     def _load_state(self) -> dict:
         """
-        Carga estado desde archivo JSON
+        Carga estado desde archivo JSON y reaplica el oplog pendiente
 
         Returns:
             Dict con estado de videos
         """
         if self.state_file.exists():
             try:
-                with open(self.state_file, "r", encoding="utf-8") as f:
-                    state = json.load(f)
-                    logger.info(f"Estado cargado: {len(state.get('processed_videos', {}))} videos")
-                    return state
+                state = _read_state_file(self.state_file)
             except Exception as e:
                 logger.error(f"Error cargando estado: {e}")
-                return self._create_empty_state()
+                state = self._create_empty_state()
         else:
             logger.info("No existe archivo de estado, creando nuevo...")
-            return self._create_empty_state()
+            state = self._create_empty_state()
+
+        # Reaplicar operaciones registradas después de la última compactación
+        self._ops_since_compact = self._replay_log(state)
+        if self._ops_since_compact:
+            self._dirty = True
+
+        logger.info("Estado cargado: %d videos", len(state.get('processed_videos', {})))
+        return state
+
+    def _replay_log(self, state: dict) -> int:
+        """
+        Aplica el oplog JSONL sobre el estado base
+
+        Args:
+            state: Estado cargado de state.json (se muta in situ)
+
+        Returns:
+            Número de operaciones reaplicadas
+        """
+        if not self.log_file.exists():
+            return 0
+
+        ops = 0
+        for line in self.log_file.read_text(encoding="utf-8").splitlines():
+            if not line:
+                continue
+            try:
+                op = _loads(line)
+            except ValueError:
+                # Línea truncada (corte a mitad de append): ignorar
+                continue
+
+            kind = op.get("op")
+            if kind == "mark":
+                state["processed_videos"][op["video_id"]] = op["data"]
+            elif kind == "remove":
+                state["processed_videos"].pop(op["video_id"], None)
+            elif kind == "last_check":
+                state["last_check"] = op["value"]
+            ops += 1
+
+        if ops:
+            logger.debug("Oplog reaplicado: %d operaciones pendientes", ops)
+        return ops
 
     def _create_empty_state(self) -> dict:
         """
@@ -46,14 +165,56 @@ class StateTracker:
         """
         return {"last_check": None, "processed_videos": {}}
 
+    def _log_op(self, op: dict):
+        """
+        Registra una mutación como una línea del oplog (O(1) por operación)
+
+        Con autosave desactivado solo marca el estado como sucio; flush()
+        escribirá luego el estado completo compactado.
+        """
+        self._dirty = True
+        if not self.autosave:
+            return
+
+        try:
+            with open(self.log_file, "ab") as f:
+                f.write(_dump_line_bytes(op))
+
+            self._ops_since_compact += 1
+            if self._ops_since_compact >= _COMPACT_EVERY:
+                self.flush()
+
+        except Exception as e:
+            logger.error(f"Error guardando estado: {e}", exc_info=True)
+            raise
+
     def _save_state(self):
-        """Guarda estado actual a archivo JSON"""
+        """Marca el estado como sucio y lo persiste si autosave está activo"""
+        self._dirty = True
+        if self.autosave:
+            self.flush()
+
+    def flush(self):
+        """
+        Compacta el estado a disco si hay cambios pendientes.
+
+        Escritura atómica: serializa a un .tmp junto al archivo final y lo
+        sustituye con os.replace, de modo que un corte a mitad de escritura
+        nunca deja un state.json truncado. El oplog se vacía después de
+        compactar.
+        """
+        if not self._dirty:
+            return
+
         try:
-            settings.ensure_directories()
-            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.state_file.with_suffix(".json.tmp")
+            tmp_path.write_bytes(_dump_state_bytes(self.state))
+            tmp_path.replace(self.state_file)
 
-            with open(self.state_file, "w", encoding="utf-8") as f:
-                json.dump(self.state, f, indent=2, ensure_ascii=False)
+            # El estado base ya incluye todo el oplog
+            self.log_file.unlink(missing_ok=True)
+            self._ops_since_compact = 0
+            self._dirty = False
 
             logger.debug("Estado guardado correctamente")
 
@@ -97,16 +258,17 @@ class StateTracker:
         # Determinar estado: completed si todos los steps son True
         status = "completed" if all(steps.values()) else "failed"
 
-        self.state["processed_videos"][video_id] = {
+        entry = {
             "video_id": video_id,
             "title": title,
-            "processed_at": datetime.utcnow().isoformat() + "Z",
+            "processed_at": _utcnow_iso(),
             "status": status,
             "steps": steps,
             "error": error,
         }
+        self.state["processed_videos"][video_id] = entry
 
-        self._save_state()
+        self._log_op({"op": "mark", "video_id": video_id, "data": entry})
 
         log_msg = f"Video {video_id} marcado como {status}"
         if error:
@@ -138,7 +300,7 @@ class StateTracker:
             if data.get("status") == "failed"
         ]
 
-        logger.debug(f"Videos fallidos: {len(failed)}")
+        logger.debug("Videos fallidos: %d", len(failed))
         return failed
 
     def retry_failed(self) -> list[str]:
@@ -152,16 +314,15 @@ class StateTracker:
 
         for video_id in failed:
             del self.state["processed_videos"][video_id]
+            self._log_op({"op": "remove", "video_id": video_id})
 
-        self._save_state()
-
-        logger.info(f"{len(failed)} videos marcados para reintento")
+        logger.info("%d videos marcados para reintento", len(failed))
         return failed
 
     def update_last_check(self):
         """Actualiza timestamp de última revisión"""
-        self.state["last_check"] = datetime.utcnow().isoformat() + "Z"
-        self._save_state()
+        self.state["last_check"] = _utcnow_iso()
+        self._log_op({"op": "last_check", "value": self.state["last_check"]})
         logger.debug("Timestamp de última revisión actualizado")
 
     def get_statistics(self) -> dict:
@@ -195,8 +356,8 @@ class StateTracker:
         """
         from datetime import timedelta
 
-        cutoff = datetime.utcnow() - timedelta(days=days)
-        cutoff_iso = cutoff.isoformat() + "Z"
+        cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+        cutoff_iso = cutoff.isoformat(timespec="seconds").replace("+00:00", "Z")
 
         initial_count = len(self.state["processed_videos"])
 
@@ -211,4 +372,4 @@ class StateTracker:
 
         if removed > 0:
             self._save_state()
-            logger.info(f"Eliminadas {removed} entradas antiguas (>{days} días)")
+            logger.info("Eliminadas %d entradas antiguas (>%d días)", removed, days)
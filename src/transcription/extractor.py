@@ -1,9 +1,46 @@
-from youtube_transcript_api import YouTubeTranscriptApi
+from array import array
+from dataclasses import dataclass
+
+from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled
 from youtube_transcript_api.formatters import TextFormatter
 from src.utils.logger import logger
 from src.utils.retry import retry_on_api_error
+import random
 import time
 
+# TextFormatter no guarda estado: una instancia por módulo basta
+_TEXT_FORMATTER = TextFormatter()
+
+
+@dataclass
+class SegmentsSoA:
+    """
+    Segmentos en disposición columnar (structure-of-arrays)
+
+    Los tiempos viven en arrays tipados contiguos (array('d')) y los textos
+    en una lista paralela: los consumidores que solo hacen aritmética sobre
+    tiempos (duraciones, estadísticas) iteran memoria compacta en vez de
+    despachar atributos objeto a objeto.
+    """
+    starts: array
+    durations: array
+    texts: list
+
+    @classmethod
+    def from_snippets(cls, snippets) -> "SegmentsSoA":
+        """Construye las columnas en una sola pasada sobre los snippets"""
+        starts = array("d")
+        durations = array("d")
+        texts = []
+        for snippet in snippets:
+            starts.append(snippet.start)
+            durations.append(snippet.duration)
+            texts.append(snippet.text)
+        return cls(starts=starts, durations=durations, texts=texts)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
 
 class TranscriptionExtractor:
     """Extractor de transcripciones de videos de YouTube"""
@@ -27,6 +64,7 @@ class TranscriptionExtractor:
               de finalizar un stream. Esta función implementa espera y reintentos.
         """
         languages_to_try = [language, "es", "en"]
+        api = YouTubeTranscriptApi()
 
         for attempt in range(max_retries):
             try:
@@ -35,10 +73,13 @@ class TranscriptionExtractor:
                     f"(intento {attempt + 1}/{max_retries})..."
                 )
 
+                # Sondeo barato primero: listar transcripciones falla rápido
+                # si están deshabilitadas, sin pagar el fetch completo
+                api.list(video_id)
+
                 # Intentar obtener transcripción en idiomas especificados
                 # API cambió: get_transcript -> fetch
                 # Ahora devuelve un FetchedTranscript con snippets
-                api = YouTubeTranscriptApi()
                 fetched = api.fetch(video_id, languages=languages_to_try)
 
                 if not fetched or not fetched.snippets:
@@ -48,8 +89,7 @@ class TranscriptionExtractor:
                 snippets = fetched.snippets
 
                 # Formatear a texto plano (el formatter acepta los snippets directamente)
-                text_formatter = TextFormatter()
-                full_text = text_formatter.format_transcript(snippets)
+                full_text = _TEXT_FORMATTER.format_transcript(snippets)
 
                 logger.info(
                     f"Transcripción obtenida exitosamente: "
@@ -57,18 +97,31 @@ class TranscriptionExtractor:
                     f"{len(snippets)} segmentos"
                 )
 
-                # Devolver snippets originales (son objetos que funcionan con los formatters)
-                return {"text": full_text, "segments": snippets}
+                # Devolver snippets originales (son objetos que funcionan con
+                # los formatters) más la vista columnar para los consumidores
+                # numéricos (estadísticas, capítulos)
+                return {
+                    "text": full_text,
+                    "segments": snippets,
+                    "arrays": SegmentsSoA.from_snippets(snippets),
+                }
+
+            except TranscriptsDisabled:
+                # No hay nada que esperar: reintentar no lo va a arreglar
+                logger.error(f"Transcripciones deshabilitadas para {video_id}")
+                raise
 
             except Exception as e:
                 logger.warning(f"Intento {attempt + 1} fallido: {e}")
 
                 if attempt < max_retries - 1:
-                    # Esperar antes de reintentar (YouTube puede estar generando)
-                    wait_time = 60 * (attempt + 1)  # 60s, 120s, 180s
+                    # Backoff exponencial con jitter (15s, 30s, 60s... tope
+                    # 300s): el caso feliz espera mucho menos que la antigua
+                    # escalera lineal de 60/120/180s
+                    wait_time = min(300, 15 * 2 ** attempt) + random.uniform(0, 5)
                     logger.info(
                         f"Transcripción no disponible aún. "
-                        f"Esperando {wait_time}s antes de reintentar..."
+                        f"Esperando {wait_time:.0f}s antes de reintentar..."
                     )
                     time.sleep(wait_time)
                 else:
@@ -1,13 +1,19 @@
 from youtube_transcript_api.formatters import SRTFormatter, WebVTTFormatter
+from src.transcription.extractor import SegmentsSoA
 from src.utils.logger import logger
 
+# Formatters sin estado: instancias únicas de módulo, compartidas por todos
+# los TranscriptionFormatter en vez de reconstruirse por video
+_SRT_FORMATTER = SRTFormatter()
+_VTT_FORMATTER = WebVTTFormatter()
+
 
 class TranscriptionFormatter:
     """Formateador de transcripciones a diferentes formatos"""
 
     def __init__(self):
-        self.srt_formatter = SRTFormatter()
-        self.vtt_formatter = WebVTTFormatter()
+        self.srt_formatter = _SRT_FORMATTER
+        self.vtt_formatter = _VTT_FORMATTER
 
     def format_as_srt(self, segments: list) -> str:
         """
@@ -89,7 +95,7 @@ class TranscriptionFormatter:
         Obtiene estadísticas de una transcripción
 
         Args:
-            segments: Lista de segmentos
+            segments: Lista de segmentos (dicts) o SegmentsSoA columnar
 
         Returns:
             Dict con estadísticas (duración, palabras, etc.)
@@ -98,14 +104,28 @@ class TranscriptionFormatter:
             return {}
 
         try:
-            # Duración total
-            first_start = segments[0]["start"]
-            last_end = segments[-1]["start"] + segments[-1]["duration"]
+            # Duración total. Con la vista columnar los tiempos salen de
+            # arrays contiguos sin tocar los dicts/objetos por segmento
+            if isinstance(segments, SegmentsSoA):
+                first_start = segments.starts[0]
+                last_end = segments.starts[-1] + segments.durations[-1]
+                texts = segments.texts
+            else:
+                first_start = segments[0]["start"]
+                last_end = segments[-1]["start"] + segments[-1]["duration"]
+                texts = (segment["text"] for segment in segments)
             total_duration = last_end - first_start
 
-            # Contar palabras
-            all_text = " ".join(segment["text"] for segment in segments)
-            word_count = len(all_text.split())
+            # Contar palabras y caracteres en una sola pasada por segmento,
+            # sin materializar el texto concatenado completo (pico de
+            # memoria O(1) en vez de 2x el tamaño de la transcripción)
+            word_count = 0
+            char_count = 0
+            for text in texts:
+                char_count += len(text)
+                word_count += len(text.split())
+            # Separadores del join equivalente (" ".join)
+            char_count += len(segments) - 1
 
             # Palabras por minuto
             wpm = (word_count / total_duration) * 60 if total_duration > 0 else 0
@@ -114,7 +134,7 @@ class TranscriptionFormatter:
                 "total_segments": len(segments),
                 "total_duration_seconds": total_duration,
                 "total_duration_minutes": total_duration / 60,
-                "total_characters": len(all_text),
+                "total_characters": char_count,
                 "total_words": word_count,
                 "words_per_minute": round(wpm, 2),
             }
@@ -1,5 +1,8 @@
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 from config.settings import settings
 
@@ -8,6 +11,11 @@ def setup_logger(name: str = "youtube_automation", level: int = logging.INFO) ->
     """
     Configura logger con rotación de archivos y output a consola
 
+    El nivel del handler de consola se controla con la variable de entorno
+    LOG_LEVEL (default: WARNING): en ejecuciones de producción los cientos
+    de logger.info por video no se formatean ni escriben al terminal. El
+    archivo conserva siempre el detalle completo (DEBUG).
+
     Args:
         name: Nombre del logger
         level: Nivel de logging (DEBUG, INFO, WARNING, ERROR, CRITICAL)
@@ -37,14 +45,25 @@ def setup_logger(name: str = "youtube_automation", level: int = logging.INFO) ->
     file_handler.setLevel(logging.DEBUG)
     file_handler.setFormatter(formatter)
 
-    # Console handler (solo INFO y superior)
+    # El handler de archivo va detrás de una cola: los logger.info/debug de
+    # los bucles calientes solo encolan el registro y la escritura a disco
+    # ocurre en el hilo del QueueListener, fuera del camino crítico
+    log_queue: queue.Queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    # Console handler (nivel vía LOG_LEVEL, default WARNING)
+    console_level = getattr(
+        logging, os.environ.get("LOG_LEVEL", "WARNING").upper(), logging.WARNING
+    )
     console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
+    console_handler.setLevel(console_level)
     console_formatter = logging.Formatter("%(levelname)s: %(message)s")
     console_handler.setFormatter(console_formatter)
 
     # Agregar handlers
-    logger.addHandler(file_handler)
+    logger.addHandler(QueueHandler(log_queue))
     logger.addHandler(console_handler)
 
     return logger
@@ -1,14 +1,14 @@
-from tenacity import (
-    retry,
-    stop_after_attempt,
-    wait_exponential,
-    retry_if_exception_type,
-    before_sleep_log,
-)
 from googleapiclient.errors import HttpError
 from config.settings import settings
 from src.utils.logger import logger
-import logging
+from functools import wraps
+import random
+import threading
+import time
+
+# Resuelto una vez en el import: el acceso a settings es un modelo pydantic
+# y no hace falta pagarlo en cada llamada decorada
+_MAX_RETRIES = settings.MAX_RETRIES
 
 
 def should_retry_http_error(exception):
@@ -38,26 +38,176 @@ def should_retry_http_error(exception):
     return False
 
 
+def _retry_after_seconds(exception) -> float | None:
+    """Extrae el header Retry-After de un HttpError 429, si lo trae"""
+    try:
+        value = exception.resp.get("retry-after")
+        return float(value) if value else None
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
 def retry_on_api_error(func):
     """
     Decorador para reintentar operaciones de API con backoff exponencial
 
+    Bucle de reintentos artesanal (sin tenacity): en el camino feliz —el
+    común— cuesta un try/except y nada más, sin objeto Retrying ni hooks
+    por llamada.
+
     Configuración:
     - Máximo intentos: settings.MAX_RETRIES (default 3)
-    - Backoff exponencial: 4s, 16s, 64s
+    - Backoff exponencial con jitter: ~4s, ~8s, ~16s... (máx 60s)
+    - En 429 respeta el header Retry-After si viene
     - Log antes de cada reintento
     """
-    return retry(
-        stop=stop_after_attempt(settings.MAX_RETRIES),
-        wait=wait_exponential(multiplier=1, min=4, max=60),
-        retry=retry_if_exception_type((HttpError, ConnectionError)),
-        before_sleep=before_sleep_log(logger, logging.WARNING),
-        reraise=True,
-    )(func)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(_MAX_RETRIES):
+            try:
+                return func(*args, **kwargs)
+            except (HttpError, ConnectionError) as e:
+                if not should_retry_http_error(e) or attempt == _MAX_RETRIES - 1:
+                    raise
+                # Jitter para no sincronizar reintentos entre procesos
+                wait_time = min(60, 4 * 2 ** attempt) + random.uniform(0, 0.5 * 2 ** attempt)
+                retry_after = _retry_after_seconds(e)
+                if retry_after is not None:
+                    wait_time = retry_after
+                logger.warning(
+                    "Reintentando %s en %.1fs (intento %d/%d): %s",
+                    func.__name__, wait_time, attempt + 1, _MAX_RETRIES, e,
+                )
+                time.sleep(wait_time)
+
+    return wrapper
+
+
+def run_parallel(fn, items, max_workers: int = 8) -> list:
+    """
+    Ejecuta fn sobre cada item en un pool de hilos (cargas I/O-bound)
+
+    Las llamadas a APIs por video son latencia de red pura: solaparlas en
+    hilos convierte N esperas secuenciales en ~N/max_workers. Los
+    resultados se devuelven en el orden de entrada; la primera excepción
+    se propaga al caller.
+
+    Ojo: httplib2.Http no es thread-safe — si fn ejecuta peticiones del
+    cliente de Google API, cada hilo debe usar su propio objeto http
+    (p. ej. google_auth_httplib2.AuthorizedHttp por llamada) o un cliente
+    propio.
+
+    Args:
+        fn: Función a aplicar a cada elemento
+        items: Iterable de elementos
+        max_workers: Hilos del pool (default: 8)
+
+    Returns:
+        Lista de resultados en el orden de items
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(fn, items))
+
+
+class LeakyBucket:
+    """
+    Limitador leaky-bucket con coste por operación (cuota diaria)
+
+    A diferencia de RateLimiter (llamadas por minuto), aquí cada operación
+    consume un coste distinto contra un presupuesto que se drena a ritmo
+    constante. Sirve para la cuota diaria de la API de YouTube: bloquear
+    antes de agotar el presupuesto evita ráfagas de 403 quotaExceeded que
+    los reintentos solo empeoran.
+    """
+
+    __slots__ = ("capacity", "leak_rate", "level", "_last", "_time", "_lock")
+
+    def __init__(self, capacity: float, leak_rate: float):
+        """
+        Args:
+            capacity: Presupuesto máximo acumulable (unidades de cuota)
+            leak_rate: Unidades que se drenan por segundo
+        """
+        self.capacity = capacity
+        self.leak_rate = leak_rate
+        self.level = 0.0
+        self._last = time.monotonic()
+        self._time = time  # compat: inyección de reloj falso en tests
+        # Los workers de run_parallel llaman acquire() concurrentemente:
+        # el read-modify-write de level debe ser atómico o se pierden
+        # adquisiciones (subcontar cuota = las ráfagas de 403 que este
+        # limitador existe para evitar)
+        self._lock = threading.Lock()
+
+    def acquire(self, cost: float = 1.0):
+        """
+        Consume `cost` unidades, bloqueando si el bucket está lleno
+
+        Args:
+            cost: Unidades de cuota de la operación
+        """
+        _time = self._time
+        while True:
+            with self._lock:
+                now = _time.monotonic()
+                self.level = max(0.0, self.level - (now - self._last) * self.leak_rate)
+                self._last = now
+
+                if self.level + cost <= self.capacity:
+                    self.level += cost
+                    return
+
+                wait_time = (self.level + cost - self.capacity) / self.leak_rate
+
+            # Dormir fuera del lock para no bloquear a otros hilos; al
+            # despertar se reevalúa, por si otro consumió mientras tanto
+            logger.warning(
+                "Presupuesto de cuota agotado. Esperando %.0fs para drenar %.0f unidades...",
+                wait_time, cost,
+            )
+            _time.sleep(wait_time)
+
+
+def with_quota(cost: int):
+    """
+    Decorador que descuenta `cost` unidades del presupuesto de YouTube
+
+    Colocar DEBAJO de retry_on_api_error para que cada reintento también
+    pague su coste (cada intento es una llamada real a la API).
+
+    Args:
+        cost: Unidades de cuota por invocación
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            youtube_quota_limiter.acquire(cost)
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
 
 
 class RateLimiter:
-    """Rate limiter simple basado en ventana deslizante"""
+    """
+    Rate limiter de ventana deslizante por contadores (dos buckets)
+
+    En vez de guardar un timestamp por llamada en una deque y barrer los
+    expirados en cada invocación (O(N) memoria, O(expirados) trabajo), se
+    mantienen solo los contadores del bucket actual y el anterior y se
+    estima la ocupación de la ventana como
+    prev * (fracción restante del período) + curr — memoria constante y
+    O(1) por llamada. Usa time.monotonic(), inmune a saltos del reloj.
+    """
+
+    # Acceso a atributos por offset fijo (sin __dict__): más barato en el
+    # camino caliente del wrapper y menos memoria por instancia
+    __slots__ = ("max_calls", "period", "_curr", "_prev", "_bucket_start", "_time", "_lock")
 
     def __init__(self, max_calls: int, period: int = 60):
         """
@@ -65,43 +215,89 @@ class RateLimiter:
             max_calls: Máximo número de llamadas permitidas
             period: Período en segundos (default: 60)
         """
-        import time
-        from collections import deque
-        from functools import wraps
-
         self.max_calls = max_calls
         self.period = period
-        self.calls = deque()
-        self._time = time
-        self._wraps = wraps
+        self._curr = 0
+        self._prev = 0
+        self._bucket_start = time.monotonic()
+        self._time = time  # compat: algunos tests inyectan un reloj falso
+        # Las llamadas guardadas por este limitador se lanzan también en
+        # concurrente (asyncio.to_thread / run_parallel): el contador debe
+        # actualizarse bajo lock para no perder registros
+        self._lock = threading.Lock()
 
-    def __call__(self, func):
-        @self._wraps(func)
-        def wrapper(*args, **kwargs):
-            now = self._time.time()
+    def _roll_buckets(self, now: float) -> float:
+        """Avanza los buckets si el período expiró; devuelve elapsed actual"""
+        elapsed = now - self._bucket_start
+        if elapsed >= self.period:
+            buckets = int(elapsed // self.period)
+            # Si pasó más de un período entero, el bucket previo ya no cuenta
+            self._prev = self._curr if buckets == 1 else 0
+            self._curr = 0
+            self._bucket_start += buckets * self.period
+            elapsed = now - self._bucket_start
+        return elapsed
+
+    def _acquire(self):
+        """Bloquea hasta que haya hueco en la ventana y registra la llamada"""
+        # Locales en el bucle caliente (LOAD_FAST en vez de LOAD_ATTR)
+        period = self.period
+        max_calls = self.max_calls
+        _time = self._time
 
-            # Limpiar llamadas antiguas (fuera de ventana)
-            while self.calls and self.calls[0] < now - self.period:
-                self.calls.popleft()
+        while True:
+            with self._lock:
+                now = _time.monotonic()
+                elapsed = self._roll_buckets(now)
+                remaining_frac = max(0.0, 1.0 - elapsed / period)
+                estimated = self._prev * remaining_frac + self._curr
 
-            # Si alcanzamos límite, esperar
-            if len(self.calls) >= self.max_calls:
-                sleep_time = self.period - (now - self.calls[0])
-                if sleep_time > 0:
-                    logger.warning(f"Rate limit alcanzado. Esperando {sleep_time:.1f}s...")
-                    self._time.sleep(sleep_time)
-                    # Limpiar después de dormir
-                    self.calls.clear()
+                if estimated < max_calls:
+                    # Registrar llamada (bajo el mismo lock que la
+                    # comprobación: chequeo y registro son atómicos)
+                    self._curr += 1
+                    return
 
-            # Registrar llamada
-            self.calls.append(self._time.time())
+                # Dormir solo hasta que la estimación decaiga lo justo para
+                # admitir, no hasta el cambio de bucket: la estimación baja
+                # linealmente con elapsed, así que el primer instante
+                # admisible es elapsed > period * (1 - (max_calls - curr) / prev).
+                # Esperar el bucket entero colaría un período de más bajo
+                # saturación (mitad del caudal configurado)
+                if self._prev > 0 and self._curr < max_calls:
+                    target = period * (1.0 - (max_calls - self._curr) / self._prev)
+                    sleep_time = max(target - elapsed, 0.05)
+                else:
+                    # Bucket actual lleno: no hay admisión hasta el siguiente
+                    sleep_time = max(period - elapsed, 0.05)
 
-            # Ejecutar función
+            # La espera va fuera del lock: otros hilos pueden seguir
+            # consultando; al despertar se reevalúa desde cero
+            logger.warning(f"Rate limit alcanzado. Esperando {sleep_time:.1f}s...")
+            _time.sleep(sleep_time)
+
+    def __call__(self, func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            self._acquire()
             return func(*args, **kwargs)
 
         return wrapper
 
+    def __enter__(self):
+        # Uso como context manager: `with limiter: ...` en bloques sueltos
+        self._acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
 
 # Instancias de rate limiters
 gemini_text_limiter = RateLimiter(max_calls=10, period=60)  # 10 RPM
 gemini_image_limiter = RateLimiter(max_calls=5, period=60)  # 5 RPM (conservador)
+
+# Presupuesto diario de la API de YouTube: 10.000 unidades drenadas a lo
+# largo de 24h. El bucket arranca vacío, así que una corrida puntual puede
+# gastar hasta la capacidad de golpe; solo el uso sostenido se frena
+youtube_quota_limiter = LeakyBucket(capacity=10_000, leak_rate=10_000 / 86_400)
@@ -1,9 +1,11 @@
 from google_auth_oauthlib.flow import InstalledAppFlow
+from google_auth_httplib2 import AuthorizedHttp
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build, Resource
 from config.settings import settings
 from src.utils.logger import logger
+import httplib2
 
 
 # Scopes necesarios para el proyecto
@@ -12,6 +14,12 @@ SCOPES = [
     "https://www.googleapis.com/auth/youtube.upload",
 ]
 
+# Singleton por proceso: el cliente construido y sus credenciales. Mientras
+# las credenciales sigan siendo válidas, las llamadas posteriores no releen
+# token.json ni reconstruyen el servicio
+_cached_service = None
+_cached_creds = None
+
 
 def get_authenticated_service() -> Resource:
     """
@@ -21,6 +29,11 @@ def get_authenticated_service() -> Resource:
     - Primera ejecución: abre navegador para autorizar, guarda token
     - Siguientes: usa token guardado, lo refresca automáticamente
 
+    El cliente se cachea a nivel de módulo: repetir la llamada devuelve la
+    misma instancia sin tocar disco ni red mientras el token sea válido
+    (refresh() muta las credenciales cacheadas in situ, así que la
+    renovación por expiración sigue siendo transparente).
+
     Returns:
         Cliente API de YouTube autenticado
 
@@ -28,6 +41,21 @@ def get_authenticated_service() -> Resource:
         FileNotFoundError: Si client_secret.json no existe
         Exception: Si falla la autenticación
     """
+    global _cached_service, _cached_creds
+
+    if _cached_service is not None and _cached_creds is not None:
+        if _cached_creds.valid:
+            return _cached_service
+        if _cached_creds.expired and _cached_creds.refresh_token:
+            try:
+                logger.info("Refrescando token de YouTube...")
+                _cached_creds.refresh(Request())
+                return _cached_service
+            except Exception as e:
+                logger.error(f"Error refrescando token: {e}")
+                _cached_service = None
+                _cached_creds = None
+
     credentials = None
     token_path = settings.YOUTUBE_OAUTH_TOKEN
 
@@ -83,8 +111,42 @@ def get_authenticated_service() -> Resource:
 
         logger.info(f"Token guardado en {token_path}")
 
-    # Construir servicio de YouTube API
-    youtube = build("youtube", "v3", credentials=credentials)
+    # Construir servicio de YouTube API. static_discovery usa el documento
+    # de descubrimiento empaquetado con el cliente (sin round-trip HTTPS ni
+    # caché en disco en el arranque frío). Un único AuthorizedHttp
+    # compartido por todas las llamadas del cliente: httplib2 mantiene la
+    # conexión por host viva (keep-alive), así el handshake TCP+TLS solo se
+    # paga una vez por corrida y no en cada petición
+    http = AuthorizedHttp(credentials, http=httplib2.Http(timeout=30))
+    youtube = build(
+        "youtube", "v3", http=http,
+        cache_discovery=False, static_discovery=True,
+    )
     logger.info("Cliente YouTube API inicializado correctamente")
 
+    _cached_service = youtube
+    _cached_creds = credentials
+
     return youtube
+
+
+def get_thread_http() -> AuthorizedHttp:
+    """
+    Devuelve un AuthorizedHttp nuevo con las credenciales cacheadas
+
+    httplib2 NO es thread-safe: los workers de run_parallel deben pasar su
+    propio objeto http en cada request (`request.execute(http=...)`) en vez
+    de compartir el del cliente. Las credenciales sí se comparten — solo la
+    capa de conexión es por hilo, y cada copia mantiene su keep-alive.
+
+    Returns:
+        AuthorizedHttp listo para usar en un hilo
+
+    Raises:
+        RuntimeError: Si aún no se llamó a get_authenticated_service()
+    """
+    if _cached_creds is None:
+        raise RuntimeError(
+            "No hay credenciales: llama a get_authenticated_service() primero"
+        )
+    return AuthorizedHttp(_cached_creds, http=httplib2.Http(timeout=30))
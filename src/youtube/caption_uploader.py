@@ -2,7 +2,7 @@ from googleapiclient.discovery import Resource
 from googleapiclient.http import MediaFileUpload
 from pathlib import Path
 from src.utils.logger import logger
-from src.utils.retry import retry_on_api_error
+from src.utils.retry import retry_on_api_error, with_quota, youtube_quota_limiter
 
 
 class CaptionUploader:
@@ -15,13 +15,17 @@ class CaptionUploader:
         """
         self.youtube = youtube
 
-    @retry_on_api_error
     def upload_captions(
         self, video_id: str, caption_file: Path, language: str = "es", name: str = None
     ) -> bool:
         """
         Sube archivo de subtítulos a un video
 
+        La validación y la construcción del request quedan fuera del
+        decorador de reintentos: solo la parte HTTP (_execute_upload) se
+        reintenta, sin repetir syscalls ni reconstruir el media en cada
+        intento.
+
         Args:
             video_id: ID del video
             caption_file: Path al archivo SRT/VTT
@@ -54,10 +58,21 @@ class CaptionUploader:
                 }
             }
 
-            # Subir archivo
-            media = MediaFileUpload(str(caption_file), mimetype="application/octet-stream")
-
-            self.youtube.captions().insert(part="snippet", body=body, media_body=media).execute()
+            # Subida resumable con chunk de 256KB (mínimo si el archivo lo
+            # supera, un solo envío si no): el protocolo permite reintentar
+            # solo el chunk fallido y el bucle next_chunk puede progresar en
+            # paralelo para varios subtítulos vía run_parallel
+            media = MediaFileUpload(
+                str(caption_file),
+                mimetype="application/octet-stream",
+                resumable=True,
+                chunksize=256 * 1024,
+            )
+
+            request = self.youtube.captions().insert(
+                part="snippet", body=body, media_body=media
+            )
+            self._execute_upload(request)
 
             logger.info(f"Subtítulos subidos correctamente para {video_id}")
             return True
@@ -67,15 +82,29 @@ class CaptionUploader:
             raise
 
     @retry_on_api_error
-    def list_captions(self, video_id: str) -> list:
+    @with_quota(cost=400)
+    def _execute_upload(self, request):
+        """Ejecuta la subida resumable (única parte que se reintenta)"""
+        response = None
+        while response is None:
+            _, response = request.next_chunk()
+        return response
+
+    @retry_on_api_error
+    @with_quota(cost=50)
+    def list_captions(self, video_id: str, filter_language: str = None):
         """
         Lista los subtítulos existentes de un video
 
         Args:
             video_id: ID del video
+            filter_language: Si se indica, no construye la lista: devuelve
+                True/False según exista una pista en ese idioma (corta en
+                la primera coincidencia)
 
         Returns:
-            Lista de subtítulos con su información
+            Lista de subtítulos con su información, o bool si se pasó
+            filter_language
 
         Quota cost: 50 unidades
         """
@@ -85,6 +114,12 @@ class CaptionUploader:
             response = request.execute()
             items = response.get("items", [])
 
+            if filter_language is not None:
+                return any(
+                    item.get("snippet", {}).get("language") == filter_language
+                    for item in items
+                )
+
             captions = []
             for item in items:
                 snippet = item.get("snippet", {})
@@ -103,9 +138,10 @@ class CaptionUploader:
 
         except Exception as e:
             logger.error(f"Error listando subtítulos: {e}", exc_info=True)
-            return []
+            return False if filter_language is not None else []
 
     @retry_on_api_error
+    @with_quota(cost=50)
     def delete_caption(self, caption_id: str) -> bool:
         """
         Elimina un subtítulo existente
@@ -141,5 +177,51 @@ class CaptionUploader:
         Returns:
             True si ya existe subtítulo en ese idioma
         """
-        captions = self.list_captions(video_id)
-        return any(caption["language"] == language for caption in captions)
+        return self.list_captions(video_id, filter_language=language)
+
+    def captions_exist_bulk(self, video_ids: list, language: str) -> dict:
+        """
+        Verifica en lote qué videos ya tienen subtítulos en un idioma
+
+        Agrupa hasta 50 captions.list por petición HTTP con
+        new_batch_http_request: un solo round-trip TLS/JSON por lote en vez
+        de uno por video. Preferible a caption_exists en bucle.
+
+        Args:
+            video_ids: Lista de IDs de video
+            language: Código de idioma a verificar
+
+        Returns:
+            Dict video_id -> True si ya existe subtítulo en ese idioma
+            (False también si la consulta de ese video falló)
+
+        Quota cost: 50 unidades por video igualmente, pero sin el overhead
+        de red por petición
+        """
+        results = {}
+
+        def _callback(request_id, response, exception):
+            if exception is not None:
+                logger.warning(f"Error consultando subtítulos de {request_id}: {exception}")
+                results[request_id] = False
+                return
+            items = response.get("items", [])
+            results[request_id] = any(
+                item.get("snippet", {}).get("language") == language for item in items
+            )
+
+        # Máximo 50 sub-peticiones por batch según la API de Google
+        for start in range(0, len(video_ids), 50):
+            chunk = video_ids[start:start + 50]
+            # El batch agrupa el transporte, pero cada captions.list
+            # dentro sigue costando sus 50 unidades
+            youtube_quota_limiter.acquire(50 * len(chunk))
+            batch = self.youtube.new_batch_http_request(callback=_callback)
+            for video_id in chunk:
+                batch.add(
+                    self.youtube.captions().list(part="snippet", videoId=video_id),
+                    request_id=video_id,
+                )
+            batch.execute()
+
+        return results
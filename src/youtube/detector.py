@@ -1,13 +1,21 @@
 from googleapiclient.discovery import Resource
 from src.utils.logger import logger
-from src.utils.retry import retry_on_api_error
+from src.utils.retry import retry_on_api_error, with_quota, youtube_quota_limiter
 from datetime import datetime, timedelta
 
 
 class StreamDetector:
     """Detector de videos de YouTube (streams y videos normales)"""
 
+    def __init__(self):
+        # Memoización por canal: la playlist 'uploads' no cambia nunca y el
+        # último video visto permite cortar la paginación en polls
+        # incrementales (patrón caché de metadata por canal)
+        self._uploads: dict[str, str] = {}
+        self._last_seen: dict[str, str] = {}
+
     @retry_on_api_error
+    @with_quota(cost=100)
     def find_new_streams(
         self, youtube: Resource, channel_id: str, max_results: int = 10, only_livestreams: bool = False
     ) -> list[str]:
@@ -31,7 +39,10 @@ class StreamDetector:
 
             logger.info(f"Buscando videos en canal {channel_id}...")
 
-            request = youtube.search().list(
+            # Con only_livestreams, eventType='completed' filtra ya en la
+            # propia búsqueda: un solo round-trip, sin el videos.list de
+            # _filter_livestreams después
+            params = dict(
                 part="snippet",
                 channelId=channel_id,
                 type="video",
@@ -39,8 +50,10 @@ class StreamDetector:
                 order="date",
                 publishedAfter=published_after,
             )
+            if only_livestreams:
+                params["eventType"] = "completed"
 
-            response = request.execute()
+            response = youtube.search().list(**params).execute()
             items = response.get("items", [])
 
             if not items:
@@ -50,16 +63,10 @@ class StreamDetector:
             # Extraer IDs de videos
             video_ids = [item["id"]["videoId"] for item in items]
 
-            logger.info(f"Encontrados {len(video_ids)} videos: {video_ids}")
-
-            # Si only_livestreams es True, filtrar solo livestreams
             if only_livestreams:
-                livestream_ids = self._filter_livestreams(youtube, video_ids)
-                logger.info(f"{len(livestream_ids)} son streams: {livestream_ids}")
-                return livestream_ids
-
-            # De lo contrario, devolver todos los videos
-            logger.info(f"Procesando todos los {len(video_ids)} videos")
+                logger.info(f"{len(video_ids)} son streams: {video_ids}")
+            else:
+                logger.info(f"Encontrados {len(video_ids)} videos: {video_ids}")
             return video_ids
 
         except Exception as e:
@@ -67,10 +74,15 @@ class StreamDetector:
             raise
 
     @retry_on_api_error
+    @with_quota(cost=1)
     def _filter_livestreams(self, youtube: Resource, video_ids: list[str]) -> list[str]:
         """
         Filtra videos que fueron livestreams
 
+        Solo como fallback: find_new_streams ya filtra con
+        eventType='completed' en la propia búsqueda; este método queda para
+        callers que parten de una lista de IDs arbitraria.
+
         Args:
             youtube: Cliente API de YouTube
             video_ids: Lista de IDs a verificar
@@ -84,9 +96,14 @@ class StreamDetector:
             return []
 
         try:
-            # Obtener detalles de videos (hasta 50 por request)
+            # Obtener detalles de videos (hasta 50 por request). El fields
+            # mask recorta la respuesta a lo único que se consulta: sin el
+            # snippet (~1-2KB por video) son decenas de KB menos de red y
+            # de JSON que parsear por lote de 50
             request = youtube.videos().list(
-                part="liveStreamingDetails,snippet", id=",".join(video_ids)
+                part="liveStreamingDetails",
+                id=",".join(video_ids),
+                fields="items(id,liveStreamingDetails/actualEndTime)",
             )
 
             response = request.execute()
@@ -95,17 +112,10 @@ class StreamDetector:
             livestream_ids = []
 
             for item in items:
-                video_id = item["id"]
-                # Verificar si tiene liveStreamingDetails
-                if "liveStreamingDetails" in item:
-                    # Verificar que el stream haya finalizado
-                    live_details = item["liveStreamingDetails"]
-                    if "actualEndTime" in live_details:
-                        livestream_ids.append(video_id)
-                        title = item["snippet"]["title"]
-                        logger.debug(
-                            f"Stream finalizado encontrado: {video_id} - {title}"
-                        )
+                # Solo streams finalizados (con actualEndTime)
+                if item.get("liveStreamingDetails", {}).get("actualEndTime"):
+                    livestream_ids.append(item["id"])
+                    logger.debug(f"Stream finalizado encontrado: {item['id']}")
 
             return livestream_ids
 
@@ -113,6 +123,37 @@ class StreamDetector:
             logger.error(f"Error filtrando livestreams: {e}", exc_info=True)
             raise
 
+    @retry_on_api_error
+    def _get_uploads_playlist_id(self, youtube: Resource, channel_id: str) -> str:
+        """
+        Resuelve la playlist de subidas del canal
+
+        Args:
+            youtube: Cliente API de YouTube
+            channel_id: ID del canal
+
+        Returns:
+            ID de la playlist 'uploads' del canal
+
+        Quota cost: 1 unidad (0 si ya está memoizada para el canal)
+        """
+        cached = self._uploads.get(channel_id)
+        if cached is not None:
+            return cached
+
+        youtube_quota_limiter.acquire(1)
+        response = youtube.channels().list(
+            part="contentDetails", id=channel_id
+        ).execute()
+
+        items = response.get("items", [])
+        if not items:
+            raise ValueError(f"Canal {channel_id} no encontrado")
+
+        uploads_id = items[0]["contentDetails"]["relatedPlaylists"]["uploads"]
+        self._uploads[channel_id] = uploads_id
+        return uploads_id
+
     @retry_on_api_error
     def get_all_channel_videos(
         self, youtube: Resource, channel_id: str, max_results: int = 500
@@ -120,6 +161,15 @@ class StreamDetector:
         """
         Obtiene TODOS los videos del canal (sin límite de fecha).
 
+        Pagina la playlist 'uploads' del canal con playlistItems.list
+        (1 unidad por página) en vez de search.list (100 unidades por
+        página): mismos datos, ~100x menos cuota y resultados completos
+        (search trunca/retrasa los listados largos).
+
+        En polls repetidos del mismo canal la paginación se corta al
+        llegar al último video visto en la corrida anterior: las llamadas
+        incrementales solo devuelven los videos nuevos desde entonces.
+
         Args:
             youtube: Cliente API de YouTube autenticado
             channel_id: ID del canal
@@ -128,21 +178,24 @@ class StreamDetector:
         Returns:
             Lista de todos los video IDs del canal
 
-        Quota cost: 100 unidades por página de 50 resultados
+        Quota cost: 1 unidad (channels.list) + 1 unidad por página de 50
         """
         try:
             logger.info(f"Obteniendo TODOS los videos del canal {channel_id}...")
 
+            uploads_id = self._get_uploads_playlist_id(youtube, channel_id)
+            last_seen = self._last_seen.get(channel_id)
+
             all_video_ids = []
             next_page_token = None
+            hit_known = False
 
-            while len(all_video_ids) < max_results:
-                request = youtube.search().list(
-                    part="id",
-                    channelId=channel_id,
-                    type="video",
+            while len(all_video_ids) < max_results and not hit_known:
+                youtube_quota_limiter.acquire(1)
+                request = youtube.playlistItems().list(
+                    part="contentDetails",
+                    playlistId=uploads_id,
                     maxResults=min(50, max_results - len(all_video_ids)),
-                    order="date",
                     pageToken=next_page_token,
                 )
 
@@ -152,8 +205,12 @@ class StreamDetector:
                 if not items:
                     break
 
-                video_ids = [item["id"]["videoId"] for item in items]
-                all_video_ids.extend(video_ids)
+                for item in items:
+                    video_id = item["contentDetails"]["videoId"]
+                    if video_id == last_seen:
+                        hit_known = True
+                        break
+                    all_video_ids.append(video_id)
 
                 logger.info(f"  Obtenidos {len(all_video_ids)} videos hasta ahora...")
 
@@ -161,6 +218,10 @@ class StreamDetector:
                 if not next_page_token:
                     break
 
+            if all_video_ids:
+                # El primero de la playlist es el más reciente del canal
+                self._last_seen[channel_id] = all_video_ids[0]
+
             logger.info(f"Total: {len(all_video_ids)} videos encontrados en el canal")
             return all_video_ids
 
@@ -169,6 +230,7 @@ class StreamDetector:
             raise
 
     @retry_on_api_error
+    @with_quota(cost=1)
     def get_video_info(self, youtube: Resource, video_id: str) -> dict:
         """
         Obtiene información detallada de un video
@@ -183,7 +245,12 @@ class StreamDetector:
         Quota cost: 1 unidad
         """
         try:
-            request = youtube.videos().list(part="snippet,liveStreamingDetails", id=video_id)
+            # fields recorta la respuesta a los campos que se devuelven
+            request = youtube.videos().list(
+                part="snippet",
+                id=video_id,
+                fields="items(id,snippet(title,description,publishedAt,channelId))",
+            )
 
             response = request.execute()
             items = response.get("items", [])
@@ -206,3 +273,45 @@ class StreamDetector:
         except Exception as e:
             logger.error(f"Error obteniendo info del video {video_id}: {e}", exc_info=True)
             raise
+
+    @retry_on_api_error
+    def get_videos_info_bulk(self, youtube: Resource, video_ids: list[str]) -> dict:
+        """
+        Obtiene información de varios videos en lote
+
+        Agrupa los IDs de 50 en 50 en un único videos.list por grupo (la
+        misma técnica que _filter_livestreams): 1 round-trip por cada 50
+        videos en vez de uno por video con get_video_info en bucle.
+
+        Args:
+            youtube: Cliente API de YouTube
+            video_ids: Lista de IDs de video
+
+        Returns:
+            Dict video_id -> info (mismo formato que get_video_info);
+            los IDs no encontrados no aparecen
+
+        Quota cost: 1 unidad por grupo de 50
+        """
+        results = {}
+
+        for start in range(0, len(video_ids), 50):
+            chunk = video_ids[start:start + 50]
+            youtube_quota_limiter.acquire(1)
+            response = youtube.videos().list(
+                part="snippet",
+                id=",".join(chunk),
+                fields="items(id,snippet(title,description,publishedAt,channelId))",
+            ).execute()
+
+            for video in response.get("items", []):
+                snippet = video.get("snippet", {})
+                results[video["id"]] = {
+                    "video_id": video["id"],
+                    "title": snippet.get("title", ""),
+                    "description": snippet.get("description", ""),
+                    "published_at": snippet.get("publishedAt", ""),
+                    "channel_id": snippet.get("channelId", ""),
+                }
+
+        return results
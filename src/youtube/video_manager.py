@@ -1,8 +1,15 @@
 from googleapiclient.discovery import Resource
-from googleapiclient.http import MediaFileUpload
+from googleapiclient.http import MediaInMemoryUpload
 from pathlib import Path
+from time import monotonic
+import mimetypes
 from src.utils.logger import logger
-from src.utils.retry import retry_on_api_error
+from src.utils.retry import retry_on_api_error, with_quota, youtube_quota_limiter
+
+# Caché de snippets por video_id con TTL corto: el videos.list previo al
+# update (read-modify-write) solo se paga una vez por video y corrida
+_SNIPPET_TTL = 300  # segundos
+_snippet_cache: dict = {}
 
 
 class VideoManager:
@@ -15,11 +22,59 @@ class VideoManager:
         """
         self.youtube = youtube
 
+    def _get_snippet(self, video_id: str) -> dict | None:
+        """
+        Obtiene el snippet de un video, sirviéndolo de la caché si es reciente
+
+        Returns:
+            Snippet del video, o None si no existe
+        """
+        cached = _snippet_cache.get(video_id)
+        if cached is not None and monotonic() - cached[0] < _SNIPPET_TTL:
+            return cached[1]
+
+        youtube_quota_limiter.acquire(1)
+        video = self.youtube.videos().list(part="snippet", id=video_id).execute()
+        if not video.get("items"):
+            return None
+
+        snippet = video["items"][0]["snippet"]
+        _snippet_cache[video_id] = (monotonic(), snippet)
+        return snippet
+
+    @retry_on_api_error
+    def prefetch_snippets(self, video_ids: list[str]):
+        """
+        Pre-carga la caché de snippets en lote (para updates masivos)
+
+        Un videos.list con 50 IDs por petición deja la caché caliente: los
+        update_metadata posteriores no pagan el round-trip de lectura.
+
+        Args:
+            video_ids: Lista de IDs de video
+
+        Quota cost: 1 unidad por grupo de 50
+        """
+        now = monotonic()
+        for start in range(0, len(video_ids), 50):
+            chunk = video_ids[start:start + 50]
+            youtube_quota_limiter.acquire(1)
+            response = self.youtube.videos().list(
+                part="snippet", id=",".join(chunk)
+            ).execute()
+            for item in response.get("items", []):
+                _snippet_cache[item["id"]] = (now, item["snippet"])
+
     @retry_on_api_error
+    @with_quota(cost=50)
     def update_metadata(self, video_id: str, title: str, description: str) -> bool:
         """
         Actualiza título y descripción de un video
 
+        El snippet actual (necesario para no borrar categoryId y demás
+        campos en el update) sale de la caché con TTL cuando está caliente,
+        ahorrando el round-trip de lectura del read-modify-write.
+
         Args:
             video_id: ID del video a actualizar
             title: Nuevo título (máx 100 caracteres)
@@ -39,15 +94,13 @@ class VideoManager:
             logger.info(f"Actualizando metadata del video {video_id}...")
             logger.debug(f"Título: {title}")
 
-            # Obtener info actual del video
-            video = self.youtube.videos().list(part="snippet", id=video_id).execute()
+            # Obtener info actual del video (caché o API)
+            snippet = self._get_snippet(video_id)
 
-            if not video.get("items"):
+            if snippet is None:
                 logger.error(f"Video {video_id} no encontrado")
                 return False
 
-            snippet = video["items"][0]["snippet"]
-
             # Actualizar campos
             snippet["title"] = title
             snippet["description"] = description
@@ -57,6 +110,9 @@ class VideoManager:
                 part="snippet", body={"id": video_id, "snippet": snippet}
             ).execute()
 
+            # La caché queda con el snippet ya fusionado
+            _snippet_cache[video_id] = (monotonic(), snippet)
+
             logger.info(f"Metadata actualizada correctamente para {video_id}")
             return True
 
@@ -64,11 +120,14 @@ class VideoManager:
             logger.error(f"Error actualizando metadata: {e}", exc_info=True)
             raise
 
-    @retry_on_api_error
     def update_thumbnail(self, video_id: str, thumbnail_path: Path) -> bool:
         """
         Sube miniatura personalizada para un video
 
+        La lectura y validación del archivo quedan fuera del decorador de
+        reintentos: solo la llamada HTTP (_execute_thumbnail_set) se
+        reintenta, reutilizando el mismo buffer en memoria.
+
         Args:
             video_id: ID del video
             thumbnail_path: Path al archivo de imagen
@@ -85,23 +144,31 @@ class VideoManager:
         - Resolución recomendada: 1280x720px
         """
         try:
-            if not thumbnail_path.exists():
+            # Una sola lectura: el archivo es <=2MB por especificación, así
+            # que cabe en memoria y la capa HTTP envía un buffer contiguo
+            # sin reabrir ni trocear el archivo. El tamaño sale del propio
+            # buffer (sin stat aparte) y FileNotFoundError cubre el exists()
+            try:
+                data = thumbnail_path.read_bytes()
+            except FileNotFoundError:
                 logger.error(f"Archivo de thumbnail no existe: {thumbnail_path}")
                 return False
 
             # Verificar tamaño (2MB max)
-            file_size = thumbnail_path.stat().st_size
-            if file_size > 2 * 1024 * 1024:  # 2MB
+            if len(data) > 2 * 1024 * 1024:  # 2MB
                 logger.error(
-                    f"Thumbnail muy grande: {file_size / (1024*1024):.2f}MB (máx 2MB)"
+                    f"Thumbnail muy grande: {len(data) / (1024*1024):.2f}MB (máx 2MB)"
                 )
                 return False
 
             logger.info(f"Subiendo thumbnail para video {video_id}...")
 
-            self.youtube.thumbnails().set(
-                videoId=video_id, media_body=MediaFileUpload(str(thumbnail_path))
-            ).execute()
+            mimetype = mimetypes.guess_type(str(thumbnail_path))[0] or "image/jpeg"
+            request = self.youtube.thumbnails().set(
+                videoId=video_id,
+                media_body=MediaInMemoryUpload(data, mimetype=mimetype),
+            )
+            self._execute_thumbnail_set(request)
 
             logger.info(f"Thumbnail actualizado correctamente para {video_id}")
             return True
@@ -111,6 +178,13 @@ class VideoManager:
             raise
 
     @retry_on_api_error
+    @with_quota(cost=50)
+    def _execute_thumbnail_set(self, request):
+        """Ejecuta el thumbnails.set (única parte que se reintenta)"""
+        return request.execute()
+
+    @retry_on_api_error
+    @with_quota(cost=1)
     def get_current_metadata(self, video_id: str) -> dict:
         """
         Obtiene metadata actual de un video
@@ -124,7 +198,12 @@ class VideoManager:
         Quota cost: 1 unidad
         """
         try:
-            video = self.youtube.videos().list(part="snippet", id=video_id).execute()
+            # fields recorta la respuesta a los campos que se devuelven
+            video = self.youtube.videos().list(
+                part="snippet",
+                id=video_id,
+                fields="items/snippet(title,description,tags,categoryId)",
+            ).execute()
 
             if not video.get("items"):
                 logger.warning(f"Video {video_id} no encontrado")